@@ -0,0 +1,57 @@
+import os, re, sys, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from parsing import BlockType, p_block_to_blocktype
+
+def old_block_to_blocktype(block):
+    # The classifier p_block_to_blocktype replaced
+    if re.match(r'^#{1,6} ', block) is not None:
+        return (BlockType.HEADING, len(re.match(r'^#{1,6} ', block).group()) - 1)
+    if re.match(r'^(`{3})(.*)(`{3})$', block, re.DOTALL):
+        return BlockType.CODE
+    if block.startswith('>'):
+        if all(line.startswith('>') for line in block.split('\n')):
+            return BlockType.QUOTE
+    if re.match(r'^(?:- .*\n?)*$', block, re.MULTILINE):
+        return BlockType.UNORDERED_LIST
+    if block.startswith("1. "):
+        temp = block
+        n = 2
+        while temp.find('\n') != -1:
+            temp = temp[temp.find('\n') + 1:]
+            if temp.startswith(f"{n}. "):
+                n += 1
+            else:
+                return BlockType.PARAGRAPH
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+def blocks(items):
+    line = "an item with a few words of text in it"
+    return {
+        "ordered list": '\n'.join(f'{i + 1}. {line}' for i in range(items)),
+        "quote": '\n'.join(f'> {line}' for _ in range(items)),
+        "unordered list": '\n'.join(f'- {line}' for _ in range(items)),
+        "code": '```\n' + '\n'.join(line for _ in range(items)) + '\n```',
+        "paragraph": '\n'.join(line for _ in range(items)),
+    }
+
+def best_of(fn, arg, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    print(f'{"block":<16} {"lines":>7} {"old ms":>10} {"new ms":>10} {"speedup":>8}')
+    for items in (100, 1000, 10000, 50000):
+        for name, block in blocks(items).items():
+            assert old_block_to_blocktype(block) == p_block_to_blocktype(block)
+            old = best_of(old_block_to_blocktype, block)
+            new = best_of(p_block_to_blocktype, block)
+            print(f'{name:<16} {items:>7} {old * 1000:>10.3f} {new * 1000:>10.3f} {old / new:>7.1f}x')
+
+if __name__ == "__main__":
+    main()
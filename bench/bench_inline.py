@@ -0,0 +1,38 @@
+import os, sys, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from textnode import TextNode, TextType
+from parsing import p_split_text_nodes, p_split_image_nodes, p_split_link_nodes, p_text_to_text_nodes
+
+SENTENCE = ("Some **bold words** then _a little italic_ and `inline code`, "
+            "a [link to somewhere](https://example.com/page) and an ![image](/images/pic.png). ")
+
+def staged_text_to_text_nodes(text):
+    # The five-pass pipeline p_text_to_text_nodes used to run
+    nodes = [TextNode(text, TextType.PLAIN_TEXT)]
+    nodes = p_split_text_nodes(nodes, "**", TextType.BOLD_TEXT)
+    nodes = p_split_text_nodes(nodes, "_", TextType.ITALIC_TEXT)
+    nodes = p_split_text_nodes(nodes, "`", TextType.CODE_TEXT)
+    nodes = p_split_image_nodes(nodes)
+    nodes = p_split_link_nodes(nodes)
+    return nodes
+
+def best_of(fn, arg, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    print(f'{"sentences":>10} {"chars":>10} {"staged ms":>10} {"single ms":>10} {"speedup":>8}')
+    for count in (10, 100, 1000, 5000):
+        text = SENTENCE * count
+        assert staged_text_to_text_nodes(text) == p_text_to_text_nodes(text)
+        staged = best_of(staged_text_to_text_nodes, text)
+        single = best_of(p_text_to_text_nodes, text)
+        print(f'{count:>10} {len(text):>10} {staged * 1000:>10.2f} {single * 1000:>10.2f} {staged / single:>7.1f}x')
+
+if __name__ == "__main__":
+    main()
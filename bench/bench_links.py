@@ -0,0 +1,58 @@
+import os, re, sys, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from textnode import TextNode, TextType
+from parsing import p_markdown_to_blocks, p_split_link_nodes
+from conversion import md_to_html
+
+def link_page(count):
+    # A changelog index: one list item per release, each a link
+    lines = ["# Changelog", ""]
+    lines += [f"- [Release 1.{i // 100}.{i % 100} notes](/changelog/1.{i // 100}.{i % 100})" for i in range(count)]
+    return '\n'.join(lines)
+
+def quadratic_split_link_nodes(old_nodes):
+    # The implementation p_split_link_nodes replaced: a fresh pattern is built
+    # from every link and the remainder of the string is re-split each time
+    new_nodes = []
+    for node in old_nodes:
+        if node.text_type == TextType.PLAIN_TEXT:
+            input = node.text
+            link_extract = re.findall(r'(?<!\!)\[(.*?)\]\((.*?)\)', input)
+            if not link_extract:
+                new_nodes.append(node)
+                continue
+            next = re.split(fr'(?<!\!)\[{link_extract[0][0]}\]\({link_extract[0][1]}\)', input, maxsplit=1)
+            for i in range(0, len(link_extract)):
+                if i != 0:
+                    next = re.split(fr'(?<!\!)\[{link_extract[i][0]}\]\({link_extract[i][1]}\)', next, maxsplit=1)
+                if next[0] != '':
+                    new_nodes.append(TextNode(next[0], TextType.PLAIN_TEXT))
+                new_nodes.append(TextNode(link_extract[i][0], TextType.LINK_ANCHOR_TEXT_URL, link_extract[i][1]))
+                if len(next) > 1:
+                    next = next[1]
+            if next != '':
+                new_nodes.append(TextNode(next, TextType.PLAIN_TEXT))
+        else:
+            new_nodes.append(node)
+    return new_nodes
+
+def timed(fn, arg):
+    start = time.perf_counter()
+    result = fn(arg)
+    return result, time.perf_counter() - start
+
+def main():
+    print(f'{"links":>8} {"old split ms":>13} {"split ms":>10} {"md_to_html ms":>14}')
+    for count in (100, 1000, 10000):
+        md = link_page(count)
+        block = p_markdown_to_blocks(md)[1]
+        nodes = [TextNode(block, TextType.PLAIN_TEXT)]
+        old, old_time = timed(quadratic_split_link_nodes, nodes)
+        new, new_time = timed(p_split_link_nodes, nodes)
+        assert old == new
+        _, page_time = timed(md_to_html, md)
+        print(f'{count:>8} {old_time * 1000:>13.2f} {new_time * 1000:>10.2f} {page_time * 1000:>14.2f}')
+
+if __name__ == "__main__":
+    main()
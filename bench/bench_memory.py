@@ -0,0 +1,65 @@
+import os, resource, sys, time, tracemalloc
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from textnode import TextNode, TextType
+from htmlnode import LeafNode
+from conversion import md_to_html
+
+class DictTextNode():
+    # What TextNode looked like before __slots__, for comparison
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+class DictLeafNode():
+    def __init__(self, tag, value, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+def bytes_per_node(factory, count=100_000):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [factory() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Subtract the list holding them
+    return (after - before - sys.getsizeof(nodes)) / count
+
+def large_document(paragraphs):
+    block = ("A paragraph with **bold**, _italic_, `code` and a [link](/somewhere) "
+             "repeated to make the page heavy. ") * 5
+    parts = ["# Large document"]
+    for i in range(paragraphs):
+        parts.append(f"## Section {i}" if i % 20 == 0 else block)
+    return "\n\n".join(parts)
+
+def main():
+    text = "shared text"
+    print("bytes per node (tracemalloc):")
+    print(f'  TextNode  dict  {bytes_per_node(lambda: DictTextNode(text, TextType.PLAIN_TEXT)):6.1f}')
+    print(f'  TextNode  slots {bytes_per_node(lambda: TextNode(text, TextType.PLAIN_TEXT)):6.1f}')
+    print(f'  LeafNode  dict  {bytes_per_node(lambda: DictLeafNode("b", text)):6.1f}')
+    print(f'  LeafNode  slots {bytes_per_node(lambda: LeafNode("b", text)):6.1f}')
+
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            md = f.read()
+    else:
+        md = large_document(5_000)
+    start = time.perf_counter()
+    tracemalloc.start()
+    root = md_to_html(md)
+    html = root.to_html()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f'render of {len(md) / 1e6:.1f}MB markdown -> {len(html) / 1e6:.1f}MB html '
+          f'in {time.perf_counter() - start:.2f}s')
+    print(f'  peak traced memory {peak / 1e6:.1f}MB')
+    print(f'  peak RSS           {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3:.1f}MB')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os, sys, time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from conversion import md_to_html, render, render_many, cached_block_html
+
+def snippets(count, unique=True):
+    # Preview-sized documents: a heading, a paragraph with some inline
+    # markup and a short list. Unique ones differ in every block
+    docs = []
+    for i in range(count):
+        n = i if unique else i % 10
+        docs.append(f"## Comment {n}\n\n"
+                    f"Thanks for the **review** number {n}, see _the notes_ and [the diff](/pr/{n}).\n\n"
+                    f"- first point {n}\n- second `point` {n}")
+    return docs
+
+def tree_render(docs):
+    return [md_to_html(md).to_html() for md in docs]
+
+def api_render(docs):
+    return list(render_many(docs))
+
+def threaded_render(docs, threads=4):
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(render, docs, chunksize=256))
+
+def rate(fn, docs, repeat=5, cold=False):
+    best = float("inf")
+    for _ in range(repeat):
+        if cold:
+            cached_block_html.cache_clear()
+        start = time.perf_counter()
+        fn(docs)
+        best = min(best, time.perf_counter() - start)
+    return len(docs) / best
+
+def main():
+    count = 20000
+    print(f'{"snippets":<10} {"md_to_html/s":>14} {"render/s":>10} {"4 threads/s":>12} {"speedup":>8}')
+    for name, unique in (("unique", True), ("repeated", False)):
+        docs = snippets(count, unique)
+        assert api_render(docs) == tree_render(docs) == threaded_render(docs)
+        tree = rate(tree_render, docs)
+        api = rate(api_render, docs, cold=unique)
+        threaded = rate(threaded_render, docs, cold=unique)
+        print(f'{name:<10} {tree:>14.0f} {api:>10.0f} {threaded:>12.0f} {api / tree:>7.1f}x')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse, os, random
+
+WORDS = ("the of and to in is was for on that with as by at from his her an be this which "
+         "or are it had not but were all their one when there we been has would they what "
+         "ring elves mountain river forest king shadow road journey council tower harbour "
+         "lantern valley song river stone winter morning fellowship wizard hobbit gate").split()
+
+# Relative weight of each block kind per feature mix
+MIXES = {
+    "mixed": {"paragraph": 6, "heading": 2, "list": 2, "ordered": 1, "quote": 1, "code": 1},
+    "prose": {"paragraph": 12, "heading": 2, "list": 1, "ordered": 0, "quote": 1, "code": 0},
+    "links": {"paragraph": 2, "heading": 1, "list": 8, "ordered": 2, "quote": 0, "code": 0},
+    "code":  {"paragraph": 3, "heading": 2, "list": 1, "ordered": 1, "quote": 0, "code": 6},
+}
+
+# (weight, min blocks, max blocks): most pages are short, a few are very long
+SIZES = ((70, 3, 12), (25, 12, 60), (5, 60, 400))
+
+def words(rng, low, high):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+def inline(rng, page_count):
+    # A sentence with a random sprinkling of inline markup
+    parts = [words(rng, 3, 10)]
+    for _ in range(rng.randint(0, 4)):
+        kind = rng.randrange(5)
+        if kind == 0:
+            parts.append(f'**{words(rng, 1, 3)}**')
+        elif kind == 1:
+            parts.append(f'_{words(rng, 1, 3)}_')
+        elif kind == 2:
+            parts.append(f'`{words(rng, 1, 2)}`')
+        elif kind == 3:
+            parts.append(f'[{words(rng, 1, 4)}]({page_url(rng.randrange(page_count))})')
+        else:
+            parts.append(f'![{words(rng, 1, 3)}](/images/img{rng.randrange(50)}.png)')
+        parts.append(words(rng, 1, 8))
+    return ' '.join(parts)
+
+def block(rng, kind, page_count):
+    match kind:
+        case "paragraph":
+            return '\n'.join(inline(rng, page_count) + '.' for _ in range(rng.randint(1, 5)))
+        case "heading":
+            return f'{"#" * rng.randint(2, 4)} {words(rng, 2, 6)}'
+        case "list":
+            return '\n'.join(f'- {inline(rng, page_count)}' for _ in range(rng.randint(2, 12)))
+        case "ordered":
+            return '\n'.join(f'{i + 1}. {inline(rng, page_count)}' for i in range(rng.randint(2, 12)))
+        case "quote":
+            return '\n'.join(f'> {words(rng, 4, 14)}' for _ in range(rng.randint(1, 4)))
+        case "code":
+            lines = [f'{rng.choice(WORDS)} = "{words(rng, 1, 4)}"' for _ in range(rng.randint(2, 15))]
+            return '```\n' + '\n'.join(lines) + '\n```'
+
+def page_path(i):
+    return f'section{i // 1000:03d}/part{i % 1000 // 100:02d}/page{i:06d}.md'
+
+def page_url(i):
+    return '/' + page_path(i).removesuffix('.md')
+
+def page(rng, page_count, mix):
+    kinds, weights = zip(*MIXES[mix].items())
+    _, low, high = rng.choices(SIZES, weights=[size[0] for size in SIZES])[0]
+    blocks = [f'# {words(rng, 2, 6).title()}']
+    blocks += [block(rng, kind, page_count)
+               for kind in rng.choices(kinds, weights=weights, k=rng.randint(low, high))]
+    return '\n\n'.join(blocks) + '\n'
+
+def generate_corpus(dest_path, pages, seed=0, mix="mixed"):
+    # Same arguments always give byte-identical files
+    rng = random.Random(f'{seed}:{mix}')
+    total = 0
+    for i in range(pages):
+        path = os.path.join(dest_path, page_path(i))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        text = page(rng, pages, mix)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        total += len(text)
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic markdown corpus")
+    parser.add_argument("dest", help="directory to write the .md files into")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", choices=sorted(MIXES), default="mixed")
+    args = parser.parse_args()
+    total = generate_corpus(args.dest, args.pages, args.seed, args.mix)
+    print(f'Wrote {args.pages} pages ({total / 1e6:.1f}MB) to "{args.dest}"')
+
+if __name__ == "__main__":
+    main()
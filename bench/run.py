@@ -0,0 +1,151 @@
+import argparse, gc, io, json, os, platform, resource, sys, tempfile, time, tracemalloc
+from contextlib import redirect_stdout
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from corpus import generate_corpus
+from parsing import (BlockType, p_markdown_to_blocks, p_block_to_blocktype, p_text_to_text_nodes,
+                     replace_md_block_format)
+from conversion import md_to_html, block_type_to_tag
+from build import generate_page_r
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "template.html")
+
+def find_md_files(content_path):
+    return sorted(os.path.join(dirpath, filename)
+                  for dirpath, _, filenames in os.walk(content_path)
+                  for filename in filenames if filename.endswith(".md"))
+
+def read_all(paths):
+    docs = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            docs.append(f.read())
+    return docs
+
+def split_blocks(docs):
+    return [block for md in docs for block in p_markdown_to_blocks(md)]
+
+def classify(blocks):
+    return [(p_block_to_blocktype(block), block) for block in blocks]
+
+def inline(typed_blocks):
+    return [p_text_to_text_nodes(replace_md_block_format(block_type_to_tag(block_type), block))
+            for block_type, block in typed_blocks if block_type != BlockType.CODE]
+
+def convert(docs):
+    return [md_to_html(md) for md in docs]
+
+def serialize(trees):
+    return sum(len(tree.to_html()) for tree in trees)
+
+def build(content_path, dest_path):
+    with redirect_stdout(io.StringIO()):
+        generate_page_r(content_path, TEMPLATE, dest_path, '/')
+
+def measure(fn, *args, memory=True, repeat=3):
+    seconds = float("inf")
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        start = time.perf_counter()
+        result = fn(*args)
+        seconds = min(seconds, time.perf_counter() - start)
+    peak = None
+    if memory:
+        # Separate run so tracing overhead doesn't distort the timing
+        del result
+        gc.collect()
+        tracemalloc.start()
+        result = fn(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, {"seconds": round(seconds, 4), "peak_mb": None if peak is None else round(peak / 1e6, 2)}
+
+def run(pages, seed, mix, memory, repeat):
+    stages = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        content_path = os.path.join(tmp, "content")
+        corpus_bytes = generate_corpus(content_path, pages, seed, mix)
+
+        paths, stages["walk"] = measure(find_md_files, content_path, memory=memory, repeat=repeat)
+        docs, stages["read"] = measure(read_all, paths, memory=memory, repeat=repeat)
+        blocks, stages["p_markdown_to_blocks"] = measure(split_blocks, docs, memory=memory, repeat=repeat)
+        typed, stages["p_block_to_blocktype"] = measure(classify, blocks, memory=memory, repeat=repeat)
+        _, stages["p_text_to_text_nodes"] = measure(inline, typed, memory=memory, repeat=repeat)
+        trees, stages["md_to_html"] = measure(convert, docs, memory=memory, repeat=repeat)
+        _, stages["to_html"] = measure(serialize, trees, memory=memory, repeat=repeat)
+        del trees, typed, blocks, docs
+        _, stages["generate_page_r"] = measure(build, content_path, os.path.join(tmp, "docs"), memory=False, repeat=1)
+
+    return {
+        "pages": pages,
+        "seed": seed,
+        "mix": mix,
+        "corpus_mb": round(corpus_bytes / 1e6, 2),
+        "python": platform.python_version(),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3, 1),
+        "stages": stages,
+    }
+
+def baseline_key(result):
+    return f'{result["mix"]}-{result["pages"]}-{result["seed"]}'
+
+def report(result, baseline, tolerance, min_seconds):
+    print(f'{result["pages"]} pages, {result["corpus_mb"]}MB of markdown, mix "{result["mix"]}", '
+          f'peak RSS {result["peak_rss_mb"]}MB')
+    print(f'{"stage":<22} {"seconds":>9} {"peak MB":>8} {"baseline":>9} {"change":>8}')
+    regressions = []
+    for stage, numbers in result["stages"].items():
+        peak = '-' if numbers["peak_mb"] is None else f'{numbers["peak_mb"]:.1f}'
+        line = f'{stage:<22} {numbers["seconds"]:>9.3f} {peak:>8}'
+        old = (baseline or {}).get("stages", {}).get(stage)
+        if old and old["seconds"] > 0:
+            change = numbers["seconds"] / old["seconds"] - 1
+            line += f' {old["seconds"]:>9.3f} {change * 100:>+7.1f}%'
+            # Stages this short are mostly timer noise
+            if change > tolerance and numbers["seconds"] >= min_seconds:
+                line += '  REGRESSION'
+                regressions.append(stage)
+        print(line)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every pipeline stage on a synthetic corpus")
+    parser.add_argument("--pages", type=int, default=1000, help="e.g. 1000, 10000 or 100000")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", default="mixed", help="corpus feature mix, see corpus.py")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store this run as the baseline for its corpus")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="slowdown flagged as a regression (default: %(default)s)")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="never flag stages faster than this (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3, help="keep the best of N timings per stage")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc passes")
+    parser.add_argument("--json", help="also write this run's numbers to a file")
+    args = parser.parse_args()
+
+    result = run(args.pages, args.seed, args.mix, not args.no_memory, args.repeat)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baselines = json.load(f)
+    regressions = report(result, baselines.get(baseline_key(result)), args.tolerance, args.min_seconds)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    if args.save_baseline:
+        baselines[baseline_key(result)] = result
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f'Saved baseline "{baseline_key(result)}" to "{args.baseline}"')
+    if regressions:
+        print(f'Regressed: {", ".join(regressions)}')
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
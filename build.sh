@@ -1 +1 @@
-python3 src/main.py "/staticsite/"
+python3 src/main.py build "/staticsite/" --jobs 0
@@ -0,0 +1,58 @@
+import json, posixpath
+from build import generate_pages, render_source, md_to_html_path, pjoin
+
+def read_records(fp, name, errors):
+    # (label, output path, markdown, title) for each line of a JSON Lines
+    # stream of {"path": ..., "markdown": ..., "title": ...} objects, title
+    # being optional. fp is read a line at a time as records are asked for.
+    # Lines that aren't a usable record are reported, added to errors by
+    # label ("name:line") and skipped
+    for number, line in enumerate(fp, 1):
+        if not line.strip():
+            continue
+        label = f'{name}:{number}'
+        try:
+            record = json.loads(line)
+            path, markdown, title = record["path"], record["markdown"], record.get("title")
+            if not isinstance(path, str) or not isinstance(markdown, str):
+                raise TypeError('"path" and "markdown" must be strings')
+            if title is not None and not isinstance(title, str):
+                raise TypeError('"title" must be a string')
+            output = output_path(path)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f'Error in record "{label}": {type(e).__name__}: {e}')
+            errors.append(label)
+            continue
+        yield label, output, markdown, title
+
+def output_path(path):
+    # "blog/post.md", "blog/post.html" and "blog/post" all become
+    # "blog/post.html". Paths that would land outside the output directory
+    # are refused
+    path = posixpath.normpath(path.replace('\\', '/'))
+    if path.startswith('/') or path == '..' or path.startswith('../') or path == '.':
+        raise ValueError(f'"{path}" is not a path inside the output directory')
+    return md_to_html_path(path.removesuffix(".html"))
+
+def generate_batch(fp, name, template_path, dest_path, basepath, jobs=1, cache_path=None,
+                   cache_size=256 << 20, io_threads=8, minify=False):
+    # Renders every record in fp (see read_records) through the template into
+    # dest_path, on the same pipeline as generate_pages, so only a bounded
+    # number of records is in memory at once. Returns the labels of records
+    # that couldn't be read or rendered
+    errors = []
+    pages = ([label, pjoin(dest_path, output), markdown, title]
+             for label, output, markdown, title in read_records(fp, name, errors))
+    failed = generate_pages(pages, template_path, basepath, jobs, cache_path, cache_size, io_threads,
+                            None, minify, read_record, render_record)
+    return errors + failed
+
+def read_record(page):
+    # Stands in for reading the source file. The markdown is taken out of
+    # the page so the pipeline's results don't hold on to it
+    source = page[2].encode('utf-8')
+    page[2] = None
+    return source
+
+def render_record(page, source):
+    return render_source((page[0], page[1]), source, page[3])
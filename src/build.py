@@ -0,0 +1,422 @@
+import mmap, os, time
+from parsing import p_iter_numbered_blocks, p_normalize_newlines
+from minify import Minifier
+from conversion import md_to_html_iter, iter_blocks_html
+from manifest import (MANIFEST_VERSION, manifest_path, load_manifest, save_manifest, file_entry,
+                      scan_files, diff_entries, needs_full_rebuild)
+from template import Template
+from profiling import profiler
+from fileio import read_bytes, write_bytes, replacing, run_pipeline
+from staticsync import sync_static, prune_output
+from walk import DEFAULT_FILTER, walk_files
+from siteindex import PageInfo, index_path, load_index, save_index
+from compress import compress_outputs, compressed_suffixes, remove_compressed
+# The process pool and the block cache (sqlite3) are imported where they're
+# used, like asyncio in fileio, so a build of a page or two doesn't pay for
+# them
+
+pjoin = os.path.join
+pexists = os.path.exists
+pisdir = os.path.isdir
+
+# Pages from sources up to this size are rendered into memory and written
+# on the I/O threads; bigger ones are streamed into place as they render
+BUFFER_THRESHOLD = 1 << 20
+# Sources bigger than this are memory-mapped and rendered block by block
+MMAP_THRESHOLD = 32 << 20
+
+def build_site(content_path, static_path, template_path, dest_path, basepath, jobs=1,
+               cache_path=None, cache_size=256 << 20, io_threads=8, static_sync="auto",
+               static_compare="mtime", path_filter=DEFAULT_FILTER, minify=False, compress=False,
+               bodies=None):
+    manifest_file = manifest_path(dest_path)
+    index_file = index_path(dest_path)
+    old = load_manifest(manifest_file)
+    with profiler.stage("scan"):
+        new = {
+            "version": MANIFEST_VERSION,
+            "basepath": basepath,
+            "minify": minify,
+            "template": file_entry(template_path, old and old["template"]),
+            "static": scan_files(static_path, old and old["static"], '', path_filter.without_include()),
+            "pages": scan_files(content_path, old and old["pages"], ".md", path_filter),
+        }
+
+    full_rebuild = needs_full_rebuild(old, new) or not pexists(dest_path)
+    carried = set()
+    if path_filter.include is not None:
+        carried = carry_over_pages(old, new, content_path, path_filter, full_rebuild)
+
+    if full_rebuild:
+        # Every page is re-rendered, but static files already in place are
+        # kept and anything that no longer has a source is pruned
+        with profiler.stage("static copy"):
+            os.makedirs(dest_path, exist_ok=True)
+            keep = set(new["static"]) | {md_to_html_path(path) for path in new["pages"]}
+            if compress:
+                keep |= {path + suffix for path in keep for suffix in compressed_suffixes()}
+            prune_output(dest_path, keep)
+            counts = sync_static(static_path, dest_path, new["static"], static_sync, static_compare)
+        print_sync_counts(counts)
+        # The scan above already walked content/, no need to walk it again
+        infos = {}
+        failed = generate_pages([(pjoin(content_path, path), pjoin(dest_path, md_to_html_path(path)))
+                                 for path in new["pages"] if path not in carried], template_path, basepath,
+                                jobs, cache_path, cache_size, io_threads, infos, minify, bodies=bodies)
+        forget_failed(new, content_path, failed)
+        index = {path: record for path, record in (load_index(index_file) or {}).items() if path in carried}
+        save_index(index_file, update_index(index, content_path, infos))
+        save_manifest(manifest_file, new)
+        if compress:
+            compress_site(dest_path, new, jobs)
+        return failed
+
+    static_changed, static_removed = diff_entries(old["static"], new["static"])
+    pages_changed, pages_removed = diff_entries(old["pages"], new["pages"])
+    # Outputs deleted by hand are rebuilt even though their source didn't change
+    static_changed += [path for path in new["static"]
+                       if path not in static_changed and not pexists(pjoin(dest_path, path))]
+    pages_changed += [path for path in new["pages"] if path not in pages_changed and path not in carried
+                      and not pexists(pjoin(dest_path, md_to_html_path(path)))]
+    index = load_index(index_file)
+    if index is None:
+        # Without an index to update, every page has to be rendered again to fill one
+        index = {}
+        pages_changed = [path for path in new["pages"] if path not in carried]
+
+    with profiler.stage("static copy"):
+        for path in static_removed:
+            remove_output(dest_path, path)
+        for path in pages_removed:
+            remove_output(dest_path, md_to_html_path(path))
+        sync_static(static_path, dest_path, {path: new["static"][path] for path in static_changed},
+                    static_sync, static_compare)
+        if not compress:
+            remove_compressed(dest_path, static_changed + [md_to_html_path(path) for path in pages_changed])
+    infos = {}
+    failed = generate_pages([(pjoin(content_path, path), pjoin(dest_path, md_to_html_path(path)))
+                             for path in pages_changed], template_path, basepath, jobs,
+                            cache_path, cache_size, io_threads, infos, minify, bodies=bodies)
+    if not (static_changed or static_removed or pages_changed or pages_removed):
+        print("Nothing to do, output is up to date")
+    forget_failed(new, content_path, failed)
+    for path in pages_removed:
+        index.pop(path, None)
+    for from_path in failed:
+        index.pop(os.path.relpath(from_path, content_path).replace(os.sep, '/'), None)
+    if pages_changed or pages_removed:
+        save_index(index_file, update_index(index, content_path, infos))
+    save_manifest(manifest_file, new)
+    if compress:
+        compress_site(dest_path, new, jobs)
+    return failed
+
+def carry_over_pages(old, new, content_path, path_filter, stale):
+    # Include patterns narrow what's built, not the site: pages outside them
+    # keep their manifest entry, and so their output, instead of counting
+    # as removed. With stale (this build re-renders every page it takes in)
+    # they're marked to be rendered by the next build that takes them in.
+    # Without a manifest (a fresh checkout, or one from another version)
+    # they're found by walking content/ instead, and are always stale since
+    # nothing says their outputs are current. Returns the pages carried over
+    if old is not None:
+        outside = {path: entry for path, entry in old["pages"].items() if not path_filter.includes(path)}
+    else:
+        outside = {path: {"size": entry.stat().st_size}
+                   for path, entry in walk_files(content_path, path_filter.without_include(), ".md")
+                   if not path_filter.includes(path)}
+        stale = True
+    for path, entry in outside.items():
+        new["pages"][path] = dict(entry, hash=None, mtime=None) if stale else entry
+    return set(outside)
+
+def compress_site(dest_path, manifest, jobs=1):
+    # Every output is offered; the ones whose .gz/.br already match are
+    # skipped after a stat, so this is cheap on an incremental build
+    with profiler.stage("compress"):
+        outputs = list(manifest["static"]) + [md_to_html_path(path) for path in manifest["pages"]]
+        compressed, current, size, packed = compress_outputs(dest_path, outputs, jobs)
+    if compressed:
+        print(f'Compressed {compressed} files ({size} -> {packed} bytes), {current} up to date or too small')
+
+def update_index(index, content_path, infos):
+    # infos maps the from_path of every page just rendered to its PageInfo
+    for from_path, info in infos.items():
+        path = os.path.relpath(from_path, content_path).replace(os.sep, '/')
+        index[path] = info.record(path, md_to_html_path(path))
+    return index
+
+def print_sync_counts(counts):
+    if counts:
+        print("Static files: " + ", ".join(f'{count} {method}' for method, count in sorted(counts.items())))
+
+def forget_failed(manifest, content_path, failed):
+    # Pages that failed to render are left out so the next build retries them
+    for from_path in failed:
+        manifest["pages"].pop(os.path.relpath(from_path, content_path).replace(os.sep, '/'), None)
+
+def md_to_html_path(path):
+    return path.removesuffix(".md") + ".html"
+
+def remove_output(dest_path, path):
+    print(f'Removing "{pjoin(dest_path, path)}"')
+    full_path = pjoin(dest_path, path)
+    if pexists(full_path):
+        os.remove(full_path)
+    remove_compressed(dest_path, [path])
+    # Prune directories the removal left empty, but never dest_path itself
+    parent = os.path.dirname(full_path)
+    while (pisdir(parent) and os.path.normpath(parent) != os.path.normpath(dest_path)
+           and not os.listdir(parent)):
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+
+def extract_title(md):
+    if not isinstance(md, str):
+        raise TypeError
+    if md.startswith("# "):
+        eol = md.find('\n') if md.find('\n') != -1 else len(md)
+        return md[2:eol]
+
+    sof = 3 + md.find("\n# ") if md.find("\n# ") != -1 else None
+    if sof:
+        eol = md.find('\n', sof) if md.find('\n', sof) != -1 else len(md)
+        return md[sof:eol]
+    raise Exception("Error: '# ' not found in string")
+
+def extract_title_bytes(buf):
+    # extract_title for bytes-like sources, e.g. a memory-mapped file
+    if buf[:2] == b"# ":
+        sof = 2
+    elif buf.find(b"\n# ") != -1:
+        sof = buf.find(b"\n# ") + 3
+    else:
+        raise Exception("Error: '# ' not found in string")
+    eol = buf.find(b'\n', sof) if buf.find(b'\n', sof) != -1 else len(buf)
+    return buf[sof:eol].decode('utf-8').removesuffix('\r')
+
+def render_mapped_page(from_path, template, dest_path, basepath, page_info=None, minify=False):
+    # For sources too big to hold in memory several times over: the file is
+    # mapped rather than read, and its blocks are found, decoded, parsed and
+    # written out one at a time, so memory is bounded by the largest block.
+    # The block cache isn't used on this path
+    with open(from_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        with profiler.stage("title"):
+            title = page_title(buf)
+        if page_info is not None:
+            page_info.title = title
+        content = lambda: iter_blocks_html(p_iter_numbered_blocks(buf), basepath, None, page_info, minify)
+        stream_page(template, {"Title": title, "Content": content}, dest_path)
+
+def stream_page(template, values, dest_path):
+    # The page is streamed into a temporary file node by node and only moved
+    # into place once complete, so it's never held in memory as one string
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    with profiler.stage("write"), replacing(dest_path) as tmp_path:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            with profiler.stage("template"):
+                template.render(profiler.writer("write", f), values)
+
+def page_values(md_file, basepath, cache=None, page_info=None, minify=False, title=None):
+    # Content is rendered only as the template writes it out: everything
+    # before it in the template is already on its way by then. page_info,
+    # if given, collects the page's build index record as that happens.
+    # The title comes from the first heading unless one is given
+    if title is None:
+        with profiler.stage("title"):
+            title = page_title(md_file)
+    if page_info is not None:
+        page_info.title = title
+    return {"Title": title, "Content": lambda: md_to_html_iter(md_file, basepath, cache, page_info, minify)}
+
+def render_content(md_file, basepath):
+    return page_title(md_file), ''.join(md_to_html_iter(md_file, basepath))
+
+def page_title(md_file):
+    try:
+        if not isinstance(md_file, str):
+            return extract_title_bytes(md_file)
+        return extract_title(md_file)
+    except Exception as e:
+        print(e)
+        return "NO TITLE FOUND"
+
+def generate_pages(pages, template_path, basepath, jobs=1, cache_path=None, cache_size=256 << 20,
+                   io_threads=8, infos=None, minify=False, read=None, render=None, bodies=None):
+    # pages is an iterable of (from_path, dest_path), consumed lazily. The
+    # template is read once here and handed to every worker; returns the
+    # from_paths that failed to render. Sources are read and pages written on
+    # io_threads threads while other pages render, here or across a pool of
+    # jobs processes; pages over BUFFER_THRESHOLD are streamed into place by
+    # the render instead. infos, if given, gets the PageInfo of every page
+    # that rendered, by from_path. With minify, pages are minified as
+    # they're serialized and the bytes that saved are reported. read(page)
+    # and render(page, source) replace reading the source file and
+    # render_source, for pages that don't come from files. bodies, if given,
+    # gets the (title, content HTML) of every page read and rendered whole,
+    # by from_path; pages are then rendered in this process
+    if isinstance(pages, list):
+        if not pages:
+            return []
+        if len(pages) == 1:
+            jobs = 1
+    if bodies is not None:
+        jobs = 1
+    with open(template_path, 'r', encoding='utf-8') as f:
+        template_file = f.read()
+
+    initargs = (template_file, template_path, basepath, cache_path, cache_size, minify, infos is not None,
+                profiler.enabled)
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+    io_threads = max(1, io_threads)
+
+    if read is None:
+        def read(page):
+            # Big sources are left for render_source to map
+            return profiler.call("read", read_bytes, page[0], MMAP_THRESHOLD)
+    render = render or render_source
+
+    def write(page, result):
+        if result["error"] is None and result["html"] is not None:
+            profiler.call("write", write_bytes, page[1], result.pop("html"))
+        return result
+
+    failed = []
+    totals = {"pages": 0, "hits": 0, "misses": 0, "saved": 0}
+
+    def tally(page, result):
+        # Each page is accounted for as it finishes and then let go, so
+        # nothing builds up however many pages there are
+        from_path = page[0]
+        totals["pages"] += 1
+        if isinstance(result, Exception):
+            # Reading the source or writing the page failed
+            result = {"error": f'{type(result).__name__}: {result}', "hits": 0, "misses": 0,
+                      "profile": None}
+        if result["error"] is not None:
+            print(f'Error generating page from "{from_path}": {result["error"]}')
+            failed.append(from_path)
+        else:
+            if infos is not None:
+                infos[from_path] = result["info"]
+            totals["saved"] += result["saved"]
+            if profiler.enabled:
+                profiler.page(from_path, result["seconds"], result["source_bytes"], result["output_bytes"])
+        if result["profile"]:
+            profiler.merge(result["profile"])
+        totals["hits"] += result["hits"]
+        totals["misses"] += result["misses"]
+
+    if jobs == 1:
+        init_worker(*initargs, bodies=bodies)
+        try:
+            run_pipeline(pages, read, render, write, io_threads, 2 * io_threads, None, tally)
+        finally:
+            close_worker()
+    else:
+        # Enough pages in flight to keep both the processes and the threads busy
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                 initargs=initargs + (True,)) as pool:
+            run_pipeline(pages, read, render, write, io_threads, 2 * max(jobs, io_threads), pool, tally)
+
+    if failed:
+        print(f'{len(failed)} of {totals["pages"]} pages failed to generate')
+    if minify:
+        print(f'Minify: {totals["saved"]} bytes saved')
+
+    if cache_path:
+        from cache import BlockCache
+        cache = BlockCache(cache_path, cache_size)
+        evicted = cache.evict()
+        cache.close()
+        hits, misses = totals["hits"], totals["misses"]
+        rate = 100 * hits / (hits + misses) if hits + misses else 0
+        print(f'Block cache: {hits} hits, {misses} misses ({rate:.1f}% hit rate), {evicted} evicted')
+    return failed
+
+worker_state = {}
+
+def init_worker(template_file, template_path, basepath, cache_path=None, cache_size=256 << 20,
+                minify=False, index=True, profile=False, ship_profile=False, bodies=None):
+    profiler.enabled = profile
+    # Worker processes send their numbers back with every page, minus
+    # whatever a forked worker inherited from the parent
+    worker_state["ship_profile"] = profile and ship_profile
+    if worker_state["ship_profile"]:
+        profiler.take()
+    worker_state["template"] = Template(template_file, basepath, minify)
+    worker_state["minify"] = minify
+    # Without an index to fill, block_info isn't worth running
+    worker_state["index"] = index
+    worker_state["bodies"] = bodies
+    worker_state["template_path"] = template_path
+    worker_state["basepath"] = basepath
+    worker_state["cache"] = None
+    if cache_path:
+        from cache import BlockCache
+        worker_state["cache"] = BlockCache(cache_path, cache_size)
+
+def close_worker():
+    if worker_state.get("cache") is not None:
+        worker_state["cache"].close()
+        worker_state["cache"] = None
+
+def render_source(page, source, title=None):
+    # The CPU half of a page: markdown bytes in, finished page bytes out for
+    # the I/O threads to write. Pages over BUFFER_THRESHOLD are streamed into
+    # dest_path as they render instead, so they're never held as one string
+    from_path, dest_path = page
+    print(f'Generating page from "{from_path}" to "{dest_path}" using "{worker_state["template_path"]}"')
+    cache = worker_state["cache"]
+    hits, misses = (cache.hits, cache.misses) if cache else (0, 0)
+    start = time.perf_counter()
+    page_info = PageInfo() if worker_state["index"] else None
+    minifier = Minifier() if worker_state["minify"] else False
+    html = None
+    try:
+        if source is None:
+            # Over MMAP_THRESHOLD, so mapped rather than read
+            render_mapped_page(from_path, worker_state["template"], dest_path, worker_state["basepath"],
+                               page_info, minifier)
+        else:
+            values = page_values(p_normalize_newlines(source.decode('utf-8')), worker_state["basepath"],
+                                 cache, page_info, minifier, title)
+            if worker_state["bodies"] is not None:
+                # Kept for the caller, so the content is rendered whole first
+                values["Content"] = ''.join(values["Content"]())
+                worker_state["bodies"][from_path] = (values["Title"], values["Content"])
+            if len(source) > BUFFER_THRESHOLD:
+                stream_page(worker_state["template"], values, dest_path)
+            else:
+                with profiler.stage("template"):
+                    html = worker_state["template"].render_string(values).encode('utf-8')
+        error = None
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+    return {
+        "error": error,
+        "html": html,
+        "info": page_info,
+        "saved": minifier.saved + worker_state["template"].saved if minifier else 0,
+        "seconds": time.perf_counter() - start,
+        "source_bytes": len(source) if source is not None else os.path.getsize(from_path),
+        "output_bytes": len(html) if html is not None else os.path.getsize(dest_path) if error is None else 0,
+        "hits": cache.hits - hits if cache else 0,
+        "misses": cache.misses - misses if cache else 0,
+        "profile": profiler.take() if worker_state["ship_profile"] else None,
+    }
+
+def generate_page_r(src_path, template_path, dest_path, basepath, jobs=1,
+                    cache_path=None, cache_size=256 << 20, io_threads=8, path_filter=DEFAULT_FILTER):
+    # Pages start rendering while the rest of the tree is still being walked
+    pages = ((entry.path, pjoin(dest_path, md_to_html_path(path)))
+             for path, entry in profiler.iter_stage("walk", walk_files(src_path, path_filter, ".md")))
+    return generate_pages(pages, template_path, basepath, jobs, cache_path, cache_size, io_threads)
+
+def create_paths(paths=("static", "content", "docs")):
+    for path in paths:
+        if not pexists(path):
+            os.mkdir(path)
+    return 0
@@ -0,0 +1,85 @@
+import hashlib, json, os, sqlite3, time
+
+# Bump whenever the HTML or info produced for a block, or the table layout,
+# changes. A database from another version is emptied when opened
+CACHE_VERSION = 2
+
+class BlockCache():
+    # Rendered block HTML in SQLite, keyed by a hash of the raw block text,
+    # along with the block's build index info as JSON. Every entry records
+    # when it was last used so the cache can be trimmed back to max_bytes,
+    # least recently used first
+    def __init__(self, path, max_bytes=256 << 20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+            self.conn.execute("DROP TABLE IF EXISTS blocks")
+            self.conn.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS blocks "
+                          "(key TEXT PRIMARY KEY, html TEXT NOT NULL, info TEXT, size INTEGER NOT NULL, "
+                          "used REAL NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS blocks_used ON blocks (used)")
+        self.conn.commit()
+
+    def key(self, block, basepath, minify=False):
+        text = f'{CACHE_VERSION}\0{basepath}\0{block}'
+        if minify:
+            text = f'minify\0{text}'
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys, with_info=False):
+        # {key: html}, or {key: (html, info)} with_info, where entries
+        # stored without info count as misses
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for i in range(0, len(unique), 500):
+            batch = unique[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT key, html, info FROM blocks WHERE key IN ({','.join('?' * len(batch))})", batch)
+            if with_info:
+                found.update((key, (html, json.loads(info))) for key, html, info in rows if info is not None)
+            else:
+                found.update((key, html) for key, html, _ in rows)
+        if found:
+            now = time.time()
+            self.conn.executemany("UPDATE blocks SET used = ? WHERE key = ?",
+                                  [(now, key) for key in found])
+            self.conn.commit()
+        hits = sum(1 for key in keys if key in found)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, rendered, infos=None):
+        if not rendered:
+            return
+        infos = infos or {}
+        now = time.time()
+        self.conn.executemany("INSERT OR REPLACE INTO blocks (key, html, info, size, used) VALUES (?, ?, ?, ?, ?)",
+                              [(key, html, json.dumps(infos[key]) if key in infos else None, len(html), now)
+                               for key, html in rendered.items()])
+        self.conn.commit()
+
+    def evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        evicted = []
+        for key, size in self.conn.execute("SELECT key, size FROM blocks ORDER BY used"):
+            if total <= self.max_bytes:
+                break
+            total -= size
+            evicted.append((key,))
+        self.conn.executemany("DELETE FROM blocks WHERE key = ?", evicted)
+        self.conn.commit()
+        return len(evicted)
+
+    def close(self):
+        self.conn.close()
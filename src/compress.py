@@ -0,0 +1,86 @@
+import gzip, os
+from fileio import replacing
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Text formats worth precompressing; images, fonts and archives already are
+COMPRESSIBLE = (".html", ".htm", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt", ".map",
+                ".csv", ".md", ".webmanifest")
+# Below this the headers outweigh what compression saves
+MIN_SIZE = 1024
+
+def encodings():
+    # (suffix, compress function) for every encoding available here
+    found = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        found.append((".br", lambda data: brotli.compress(data, quality=11)))
+    return found
+
+def compressed_suffixes():
+    return [suffix for suffix, _ in encodings()]
+
+def wants_compression(path):
+    return path.lower().endswith(COMPRESSIBLE)
+
+def compress_outputs(dest_path, paths, jobs=0, min_size=MIN_SIZE):
+    # Writes .gz (and .br, with the brotli module) next to every compressible
+    # file in paths, relative to dest_path, on a pool of threads: zlib and
+    # brotli let go of the GIL while they work. Compressed files get their
+    # source's mtime, so ones that are already up to date are skipped.
+    # Returns (compressed, skipped, bytes in, bytes out)
+    from concurrent.futures import ThreadPoolExecutor
+    work = [os.path.join(dest_path, path) for path in paths if wants_compression(path)]
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+        results = list(pool.map(lambda path: compress_file(path, min_size), work))
+    compressed = sum(1 for result in results if result is not None)
+    return (compressed, len(results) - compressed,
+            sum(result[0] for result in results if result is not None),
+            sum(result[1] for result in results if result is not None))
+
+def compress_file(path, min_size=MIN_SIZE):
+    # (source bytes, compressed bytes) if anything was written, else None
+    st = os.stat(path)
+    todo = []
+    for suffix, compress in encodings():
+        target = path + suffix
+        if st.st_size < min_size:
+            remove_if_exists(target)
+        elif not is_fresh(target, st):
+            todo.append((target, compress))
+    if not todo:
+        return None
+    with open(path, 'rb') as f:
+        data = f.read()
+    written = 0
+    for target, compress in todo:
+        packed = compress(data)
+        if len(packed) >= len(data):
+            remove_if_exists(target)
+            continue
+        with replacing(target) as tmp_path:
+            with open(tmp_path, 'wb') as f:
+                f.write(packed)
+            os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        written += len(packed)
+    return len(data), written
+
+def is_fresh(target, source_stat):
+    try:
+        return os.stat(target).st_mtime_ns == source_stat.st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+def remove_compressed(dest_path, paths):
+    # Drops the compressed siblings of outputs that changed in a build that
+    # isn't compressing, so a stale .gz is never served in their place
+    for path in paths:
+        for suffix in (".gz", ".br"):
+            remove_if_exists(os.path.join(dest_path, path + suffix))
+
+def remove_if_exists(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
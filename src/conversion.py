@@ -1,38 +1,218 @@
+from functools import lru_cache
 from parsing import *
 from textnode import *
 from htmlnode import *
+from profiling import profiler
+from minify import Minifier
 
-def md_to_html(md):
+def md_to_html(md, basepath='/', cache=None):
     if not isinstance(md, str):
         raise TypeError("o7 Input should be a string")
 
-    blocks = p_markdown_to_blocks(md)
+    with profiler.stage("block split"):
+        blocks = p_markdown_to_blocks(md)
+    if cache is not None:
+        return cached_md_to_html(blocks, basepath, cache)
+    html_parent_nodes = [block_to_html_node(block, basepath) for block in blocks]
+
+    root_node = ParentNode("div", html_parent_nodes)
+
+    return root_node
+
+def cached_md_to_html(blocks, basepath, cache):
+    return ParentNode("div", cached_block_nodes(blocks, basepath, cache))
+
+def cached_block_nodes(blocks, basepath, cache, infos=None, minify=False):
+    # Blocks seen before come back as ready-made HTML, only the new ones are
+    # classified and inline-parsed. Each block's index info is cached next to
+    # its HTML and appended to infos when that's given. Minified blocks are
+    # cached apart from the others, with the bytes minifying saved in "saved"
+    with profiler.stage("block cache"):
+        keys = [cache.key(block, basepath, minify) for block in blocks]
+        found = cache.get_many(keys, with_info=True)
+    rendered = {}
     html_parent_nodes = []
-    for block in blocks:
+    for block, key in zip(blocks, keys):
+        if key in found:
+            html, info = found[key]
+        elif key in rendered:
+            html, info = rendered[key]
+        else:
+            info = {}
+            node = block_to_html_node(block, basepath, info)
+            minifier = Minifier() if minify else None
+            with profiler.stage("serialize"):
+                html = node.to_html(minifier)
+            if minifier is not None and minifier.saved:
+                info["saved"] = minifier.saved
+            rendered[key] = (html, info)
+        html_parent_nodes.append(LeafNode(None, html))
+        if infos is not None:
+            infos.append(info)
+    with profiler.stage("block cache"):
+        cache.put_many({key: html for key, (html, _) in rendered.items()},
+                       {key: info for key, (_, info) in rendered.items()})
+    return html_parent_nodes
+
+# Blocks looked up in the cache per round trip when streaming
+CACHE_BATCH = 64
+
+def md_to_html_iter(md, basepath='/', cache=None, page_info=None, minify=False):
+    # Streaming md_to_html: yields the same HTML as md_to_html(...).to_html()
+    # a fragment at a time. Blocks are split off, typed, parsed and rendered
+    # only as the output reaches them, so writing can start straight away
+    # and no tree for the whole document is ever built
+    if not isinstance(md, str):
+        raise TypeError("o7 Input should be a string")
+    return iter_blocks_html(p_iter_numbered_blocks(md), basepath, cache, page_info, minify)
+
+def iter_blocks_html(numbered_blocks, basepath='/', cache=None, page_info=None, minify=False):
+    # numbered_blocks are (line, block) pairs. page_info, if given, is handed
+    # every block's info (see block_info) along with its line as it's
+    # rendered; without one, block_info isn't run at all. With minify,
+    # insignificant whitespace is dropped as the nodes are serialized.
+    # minify may also be the Minifier to use, whose saved then counts the
+    # bytes that saved, cached blocks included
+    numbered_blocks = profiler.iter_stage("block split", numbered_blocks)
+    minifier = (minify if isinstance(minify, Minifier) else Minifier()) if minify else None
+    if cache is not None:
+        # Cached HTML comes out of the cache already minified
+        nodes = iter_cached_nodes(numbered_blocks, basepath, cache, page_info, minifier)
+        serializer = None
+    else:
+        nodes = iter_nodes(numbered_blocks, basepath, page_info)
+        serializer = minifier
+    node = next(nodes, None)
+    if node is None:
+        raise ValueError("Parent node has no children")
+    yield '<div>'
+    while node is not None:
+        yield from profiler.iter_stage("serialize", node.iter_html(serializer))
+        node = next(nodes, None)
+    yield '</div>'
+
+def iter_nodes(numbered_blocks, basepath, page_info=None):
+    for line, block in numbered_blocks:
+        info = {} if page_info is not None else None
+        with profiler.stage("node build"):
+            node = block_to_html_node(block, basepath, info)
+        if page_info is not None:
+            page_info.add_block(line, info)
+        yield node
+
+def iter_cached_nodes(numbered_blocks, basepath, cache, page_info=None, minifier=None):
+    batch = []
+    for numbered_block in numbered_blocks:
+        batch.append(numbered_block)
+        if len(batch) == CACHE_BATCH:
+            yield from cached_batch(batch, basepath, cache, page_info, minifier)
+            batch = []
+    if batch:
+        yield from cached_batch(batch, basepath, cache, page_info, minifier)
+
+def cached_batch(batch, basepath, cache, page_info, minifier=None):
+    # The cache keeps every block's info either way, so it's to hand even
+    # without a page_info: minifier.saved is counted from it
+    infos = []
+    nodes = cached_block_nodes([block for _, block in batch], basepath, cache, infos, minifier is not None)
+    if page_info is not None:
+        for (line, _), info in zip(batch, infos):
+            page_info.add_block(line, info)
+    if minifier is not None:
+        minifier.saved += sum(info.get("saved", 0) for info in infos)
+    return nodes
+
+# Blocks render_block keeps the HTML of, and the longest block it keeps
+RENDER_CACHE_SIZE = 4096
+RENDER_CACHE_MAX_BLOCK = 4096
+
+def render(md, basepath='/', minify=False):
+    # The stable entry point for rendering a markdown string in-process:
+    # the same HTML as md_to_html(md, basepath).to_html(), without building
+    # a tree for the whole document. Thread-safe, nothing is shared between
+    # calls but render_block's cache, which is
+    if not isinstance(md, str):
+        raise TypeError("o7 Input should be a string")
+    blocks = p_markdown_to_blocks(md)
+    if not blocks:
+        raise ValueError("Parent node has no children")
+    return f'<div>{"".join([render_block(block, basepath, minify) for block in blocks])}</div>'
+
+def render_many(mds, basepath='/', minify=False):
+    # render for every string in mds, lazily and in order
+    for md in mds:
+        yield render(md, basepath, minify)
+
+def render_block(block, basepath='/', minify=False):
+    # Short blocks that come up again (a heading, a signature, a boilerplate
+    # paragraph) are rendered once. Long ones would only crowd the cache
+    if len(block) > RENDER_CACHE_MAX_BLOCK:
+        return block_html(block, basepath, minify)
+    return cached_block_html(block, basepath, minify)
+
+def block_html(block, basepath='/', minify=False):
+    return block_to_html_node(block, basepath).to_html(Minifier() if minify else None)
+
+cached_block_html = lru_cache(maxsize=RENDER_CACHE_SIZE)(block_html)
+
+def block_to_html_node(block, basepath='/', info=None):
+    # info, if given, is a dict to fill in with block_info
+    with profiler.stage("classify"):
         block_type = p_block_to_blocktype(block)
+    tag = block_type_to_tag(block_type)
+    # Markdown markers are stripped here, once, so the node tree is never
+    # modified after it's built and can be rendered any number of times
+    block = replace_md_block_format(tag, block)
 
-        if block_type == BlockType.CODE:
-            code_block_content = p_text_node_to_html_node(TextNode(block, TextType.PLAIN_TEXT))
-            parent_node = ParentNode(block_type_to_tag(block_type), code_block_content)
-            html_parent_nodes.append(parent_node)
-            continue
+    if block_type == BlockType.CODE:
+        code_block_content = p_text_node_to_html_node(TextNode(block, TextType.PLAIN_TEXT))
+        return ParentNode(tag, code_block_content)
 
-        if block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
-            block = replace_md_block_format(block_type, block) 
-            block = block.split('\n')
-            for i in range(len(block)):
-                block[i] = f'<li>{block[i]}</li>'
-            block = '\n'.join(block)
+    if block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
+        block = block.split('\n')
+        for i in range(len(block)):
+            block[i] = f'<li>{block[i]}</li>'
+        block = '\n'.join(block)
 
+    with profiler.stage("inline parse"):
         text_subnodes = p_text_to_text_nodes(block)
-        html_subnodes = [p_text_node_to_html_node(node) for node in text_subnodes]
-        #LeafNodes^^
-        parent_node = ParentNode(block_type_to_tag(block_type), html_subnodes)
-        html_parent_nodes.append(parent_node)
+    if info is not None:
+        info.update(block_info(block_type, text_subnodes))
+    html_subnodes = [p_text_node_to_html_node(node, basepath) for node in text_subnodes]
+    #LeafNodes^^
+    if not html_subnodes:
+        # Nothing left once the markers are stripped, e.g. a bare ">"
+        html_subnodes = [LeafNode(None, '')]
+    return ParentNode(tag, html_subnodes)
 
-    root_node = ParentNode("div", html_parent_nodes)
-
-    return root_node
+def block_info(block_type, text_nodes):
+    # What the build index keeps of a block, straight from its text nodes:
+    # {"heading": [level, text]} for headings, [url, line] pairs for
+    # "links" and "images" (line counted from the block's first), and the
+    # number of "words". Keys without anything to record are left out
+    info = {}
+    links, images = [], []
+    line = words = 0
+    for node in text_nodes:
+        text_type, text = node.text_type, node.text
+        if text_type is TextType.LINK_ANCHOR_TEXT_URL:
+            links.append([node.url, line])
+        elif text_type is TextType.IMAGE_ALT_TEXT_URL:
+            images.append([node.url, line])
+        if text_type is not TextType.IMAGE_ALT_TEXT_URL:
+            # str.split() counts words faster than any regex does
+            words += len(text.split())
+        if '\n' in text:
+            line += text.count('\n')
+    if isinstance(block_type, tuple):
+        info["heading"] = [block_type[1], ''.join(node.text for node in text_nodes)]
+    if links:
+        info["links"] = links
+    if images:
+        info["images"] = images
+    if words:
+        info["words"] = words
+    return info
 
 def block_type_to_tag(block_type):
     match(block_type):
@@ -0,0 +1,112 @@
+import os
+from contextlib import contextmanager
+
+def read_bytes(path, max_size=None):
+    # None when the file is over max_size, for callers with another plan for
+    # big files
+    with open(path, 'rb') as f:
+        if max_size is not None and os.fstat(f.fileno()).st_size > max_size:
+            return None
+        return f.read()
+
+@contextmanager
+def replacing(path):
+    # Yields a temporary path next to path to be written however the caller
+    # likes, and renames it over path once the block completes, so an
+    # interrupted build never leaves a half-written file behind. If the
+    # block raises, the temporary file is removed instead
+    tmp_path = f'{path}.tmp'
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_bytes(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with replacing(path) as tmp_path:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+
+END = object()
+
+def run_pipeline(items, read, process, write, io_threads=8, in_flight=16, cpu_executor=None,
+                 on_result=None):
+    if isinstance(items, list) and len(items) <= 1 and cpu_executor is None:
+        # Nothing to overlap, so no event loop or threads to start (or
+        # import) either
+        results = [(item, run_serial(item, read, process, write)) for item in items]
+        if on_result is None:
+            return results
+        for item, result in results:
+            on_result(item, result)
+        return None
+    import asyncio
+    return asyncio.run(pipeline(items, read, process, write, io_threads, in_flight, cpu_executor,
+                                on_result))
+
+def run_serial(item, read, process, write):
+    try:
+        return write(item, process(item, read(item)))
+    except Exception as e:
+        return e
+
+async def pipeline(items, read, process, write, io_threads, in_flight, cpu_executor, on_result=None):
+    # read(item) and write(item, processed) run on a pool of io_threads
+    # threads so slow storage always has several requests outstanding.
+    # process(item, data) is the CPU part: it runs in cpu_executor (e.g. a
+    # process pool) or, without one, on the event loop itself while the
+    # threads carry on reading ahead and writing behind. At most in_flight
+    # items are between read and write at any time, which bounds memory, and
+    # items may be a generator that is only advanced as slots free up.
+    # Returns (item, result) pairs in order, the result being what write
+    # returned or the exception raised along the way. With on_result, each
+    # pair is instead handed to it as soon as it's done and nothing is kept,
+    # so memory stays bounded however many items there are
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    loop = asyncio.get_running_loop()
+    io_pool = ThreadPoolExecutor(max_workers=io_threads, thread_name_prefix="io")
+    slots = asyncio.Semaphore(in_flight)
+    results = []
+
+    async def run_one(i, item):
+        try:
+            data = await loop.run_in_executor(io_pool, read, item)
+            if cpu_executor is None:
+                processed = process(item, data)
+            else:
+                processed = await loop.run_in_executor(cpu_executor, process, item, data)
+            result = await loop.run_in_executor(io_pool, write, item, processed)
+        except Exception as e:
+            result = e
+        finally:
+            slots.release()
+        if on_result is None:
+            results[i] = (item, result)
+        else:
+            on_result(item, result)
+
+    tasks = set()
+    try:
+        items = iter(items)
+        while True:
+            # Take a slot before pulling the next item, not after
+            await slots.acquire()
+            item = next(items, END)
+            if item is END:
+                break
+            if on_result is None:
+                results.append(None)
+            task = asyncio.create_task(run_one(len(results) - 1, item))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.wait(tasks)
+    finally:
+        io_pool.shutdown(wait=True)
+    return results if on_result is None else None
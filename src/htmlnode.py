@@ -1,16 +1,25 @@
-import re
-from textnode import BlockType
-
 class HTMLNode():
+    # Pages create hundreds of thousands of these, skip the per-instance __dict__
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
 
-    def to_html(self):
+    # minify, if given, is applied to text as it's serialized (see
+    # minify.Minifier); nothing inside a code element is passed to it
+    def to_html(self, minify=None):
         raise NotImplementedError
 
+    def iter_html(self, minify=None):
+        raise NotImplementedError
+
+    def write_html(self, fp, minify=None):
+        for chunk in self.iter_html(minify):
+            fp.write(chunk)
+
     def props_to_html(self):
         output_string = ""
         if self.props:
@@ -41,20 +50,28 @@ class HTMLNode():
         return output
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props) 
         # None corresponds to where  ^^^^ "children" 
         # would be expected. LeafNodes can't have children
 
-    def to_html(self):
+    def to_html(self, minify=None):
         if self.value is None:
             raise ValueError("Leaf node has no value")
+        value = minify(self.value) if minify is not None and self.tag != 'code' else self.value
         if self.tag is None:
-            return self.value
+            return value
+
+        return f'<{self.tag}{self.props_to_html()}>{value}</{self.tag}>'
 
-        return f'<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>'
+    def iter_html(self, minify=None):
+        yield self.to_html(minify)
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         if not isinstance(children, list):
             super().__init__(tag, None, [children], props) # Just to make sure children is list
@@ -63,48 +80,37 @@ class ParentNode(HTMLNode):
         #                     ^^^^
         # Parent Nodes have no text content
 
-    def to_html(self):
+    def to_html(self, minify=None):
+        # iter_html without a generator per node: a block's worth of nodes
+        # is small enough to join in one go
+        if self.tag is None:
+            raise ValueError("Parent node has no tag")
+        if not self.children:
+            raise ValueError("Parent node has no children")
+        if self.tag == 'code':
+            inner = ''.join([child_node.to_html() for child_node in self.children])
+            return f'<pre><code{self.props_to_html()}>{inner}</code></pre>'
+        inner = ''.join([child_node.to_html(minify) for child_node in self.children])
+        return f'<{self.tag}{self.props_to_html()}>{inner}</{self.tag}>'
+
+    def iter_html(self, minify=None):
+        # Yields the markup a piece at a time so callers can stream it
+        # straight into a file instead of building one big string
         if self.tag is None:
             raise ValueError("Parent node has no tag")
         if not self.children or self.children == []:
             raise ValueError("Parent node has no children")
 
         # Open Tag
-        output = ""
         if self.tag == 'code':
-            output = '<pre>'                                    
-        output += f'<{self.tag}{self.props_to_html()}>'        
-
-        # Header
-        # Strip MD header formatting
-        if self.tag in ("ul", "ol", "blockquote"):
-            for child in self.children:
-                child.value = replace_md_block_format(self.tag, child.value)
-        else:
-            self.children[0].value = replace_md_block_format(self.tag, self.children[0].value)
+            yield '<pre>'                                    
+        yield f'<{self.tag}{self.props_to_html()}>'        
 
+        if self.tag == 'code':
+            minify = None
         for child_node in self.children:
-            output += child_node.to_html()
-        output += f'</{self.tag}>'                            
+            yield from child_node.iter_html(minify)
+        yield f'</{self.tag}>'                            
         if self.tag == 'code':
-            output += '</pre>'                                    
+            yield '</pre>'                                    
         # Close Tag
-        return output
-    
-def replace_md_block_format(tag, md_string):
-    match tag:
-        case 'p' | BlockType.PARAGRAPH:
-            return md_string
-        case "code" | BlockType.CODE:
-            return md_string.strip("```")
-        case "blockquote" | BlockType.QUOTE:
-            return md_string[2:].replace("\n>", '\n')
-        case "ul" | BlockType.UNORDERED_LIST:
-            return md_string.lstrip("- ").replace("\n- ", '\n')
-        case "ol" | BlockType.ORDERED_LIST:
-            return re.sub(r"^\d+\.\s", '', md_string, flags=re.M)
-        case _:
-            if tag[0] == 'h' or tag == BlockType.HEADING:
-                return md_string.lstrip("# ")
-            return md_string
-
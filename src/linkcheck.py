@@ -0,0 +1,60 @@
+import os, posixpath
+from urllib.parse import urlsplit, unquote
+from manifest import manifest_path, load_manifest
+from siteindex import index_path, load_index
+
+def site_paths(index, static_paths):
+    # Every path the site serves, relative to its root: rendered pages from
+    # the build index plus the static files
+    paths = set(static_paths)
+    paths.update(record["output"] for record in index.values())
+    return paths
+
+def resolve(url, page_output):
+    # The site path an internal link points at, or None for links that leave
+    # the site (other schemes or hosts) or only move within the page
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    path = unquote(parts.path)
+    if not path.startswith('/'):
+        path = posixpath.join(posixpath.dirname(page_output), path)
+    path = posixpath.normpath(path).lstrip('/')
+    return '' if path == '.' else path
+
+def exists(path, paths):
+    # "/blog/post" can be served as blog/post, blog/post.html or
+    # blog/post/index.html
+    if path in paths or f'{path}.html' in paths:
+        return True
+    return posixpath.join(path, "index.html") in paths
+
+def find_broken(index, static_paths):
+    # [(source path, line, url)] for every link and image target in the index
+    # that doesn't resolve to a page or static file. One set lookup (or three)
+    # per link, and nothing but the index is read
+    paths = site_paths(index, static_paths)
+    broken = []
+    for source in sorted(index):
+        record = index[source]
+        for url, line in sorted(record["links"] + record["images"], key=lambda link: link[1]):
+            path = resolve(url, record["output"])
+            if path is not None and not exists(path, paths):
+                broken.append((source, line, url))
+    return broken
+
+def check_links(content_path, dest_path):
+    # Runs on the build index and manifest the last build left next to
+    # dest_path, so no markdown or HTML is read. Returns whether every
+    # internal link resolved
+    index = load_index(index_path(dest_path))
+    manifest = load_manifest(manifest_path(dest_path))
+    if index is None or manifest is None:
+        print(f'No build index for "{dest_path}", build the site first')
+        return False
+    broken = find_broken(index, manifest["static"])
+    for source, line, url in broken:
+        print(f'{os.path.join(content_path, source)}:{line}: broken link "{url}"')
+    links = sum(len(record["links"]) + len(record["images"]) for record in index.values())
+    print(f'Checked {links} links in {len(index)} pages, {len(broken)} broken')
+    return not broken
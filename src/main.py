@@ -1,105 +1,182 @@
-import os, shutil, sys
-from textnode import *
-from htmlnode import *
-from parsing import *
-from conversion import md_to_html
-
-pjoin = os.path.join
-pexists = os.path.exists
-pisdir = os.path.isdir
-
-def main():
-    basepath = sys.argv[1] if len(sys.argv) > 1 else '/'
-    create_paths() 
-    clean_path(f"docs")
-    populate_directory("static", "docs")
-    generate_page_r(f"content",
-                    f"template.html",
-                    f"docs", basepath)
-    
-def clean_path(dest_path):
-    if pexists(dest_path):
-        shutil.rmtree(dest_path)
-    os.mkdir(dest_path)
- 
-def populate_directory(src_path, dest_path):
-    src_path_full = src_path                
-    if not pexists(src_path_full):
-        raise FileNotFoundError(f'{src_path_full} not found.')
-    if not os.path.exists(dest_path):  
-        raise FileNotFoundError(f'{dest_path} not found.')
-    
-    for path in os.listdir(src_path_full):
-        if pisdir(pjoin(src_path_full, path)):
-            os.mkdir(f"{dest_path}/{path}")
-            populate_directory(pjoin(src_path_full, path), pjoin(dest_path, path))
-            continue
-        shutil.copy(pjoin(src_path_full, path),
-                    pjoin(os.getcwd(), dest_path))
-
-def extract_title(md):
-    if not isinstance(md, str):
-        raise TypeError
-    if md.startswith("# "):
-        eol = md.find('\n') if md.find('\n') != -1 else len(md)
-        return md[2:eol]
-
-    sof = 3 + md.find("\n# ") if md.find("\n# ") != -1 else None
-    if sof:
-        eol = md[sof:].find('\n') if md[sof:].find('\n') != -1 else len(md)
-        return md[sof:eol]
-    raise Exception("Error: '# ' not found in string")
-
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f'Generating page from "{from_path}" to "{dest_path}" using "{template_path}"')
-    with open(from_path, 'r', encoding='utf-8') as f:
-        md_file = f.read()  
-    with open(template_path, 'r', encoding='utf-8') as f:
-        template_file = f.read()
-
-    html_content = md_to_html(md_file).to_html()
-    try:
-        title = extract_title(md_file)
-    except Exception as e:
-        print(e)
-        title = "NO TITLE FOUND"
-    template_file = template_file.replace('{{ Title }}', title
-                                ).replace('{{ Content }}', html_content)
-    template_file = template_file.replace('href="/', f'href="{basepath}'
-                                ).replace('src="/', f'src="{basepath}')
-
-    full_dest_path = dest_path
-    if not pexists(os.path.dirname(full_dest_path)):
-        os.makedirs(os.path.dirname(full_dest_path))
-    with open(full_dest_path, 'a', encoding='utf-8') as f:
-        f.write(template_file)
-
-def generate_page_r(src_path, template_path, dest_path, basepath):
-    matches = []
-
-    def find_md_files(inner_path):
-        nonlocal matches
-        for path in os.listdir(inner_path):
-            if pisdir(pjoin(inner_path, path)):
-                find_md_files(pjoin(inner_path, path))
-                continue
-            if path[-3:] == ".md":
-                matches.append(f'{inner_path}/{path[:-3]}'.removeprefix(src_path+'/'))
-
-    find_md_files(src_path) 
-
-    for path in matches:
-        generate_page(f'{src_path}/{path}.md', template_path, f'{dest_path}/{path}.html', basepath)
-
-def create_paths():
-    paths = [
-        "static",
-        "content",
-        "docs",
-    ]
-    for path in paths:
-        if not pexists(path):
-            os.mkdir(path)
+import argparse, sys, time
+
+# Each subcommand imports what it needs only once it runs, so importing this
+# module does nothing, and a check or a small build doesn't load the parts
+# of the engine it won't use
+COMMANDS = ("build", "serve", "check", "batch")
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] not in COMMANDS and argv[0] not in ("-h", "--help"):
+        # "main.py [basepath] [options]" still builds, as it did before
+        # there were subcommands
+        argv = ["build"] + argv
+    args = make_parser().parse_args(argv)
+    return args.run(args)
+
+def make_parser():
+    from staticsync import SYNC_MODES, COMPARE_MODES
+    parser = argparse.ArgumentParser(description="Build, serve and check the site")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="render the site (the default command)",
+                                description="Build the site from content/ into docs/")
+    build.add_argument("basepath", nargs='?', default='/')
+    add_path_options(build, content=True, static=True, template=True)
+    build.add_argument("-j", "--jobs", type=int, default=1,
+                       help="render pages across N processes (0 = one per CPU)")
+    add_cache_options(build)
+    build.add_argument("--static-sync", choices=SYNC_MODES, default="auto",
+                       help="how static/ reaches docs/: auto tries a reflink and falls back to a "
+                            "copy, hardlink shares the source file (default: %(default)s)")
+    build.add_argument("--static-compare", choices=COMPARE_MODES, default="mtime",
+                       help="how an existing output is judged up to date: size and mtime, or "
+                            "size and content hash (default: %(default)s)")
+    add_filter_options(build)
+    add_io_threads_option(build)
+    build.add_argument("--check-links", action="store_true",
+                       help="after the build, report internal links and images that point nowhere "
+                            "and exit with an error if there are any")
+    add_minify_option(build)
+    build.add_argument("--compress", action="store_true",
+                       help="write .gz (and .br, if the brotli module is installed) next to every "
+                            "HTML, CSS and other text output, on --jobs threads")
+    build.add_argument("--profile", action="store_true",
+                       help="print a per-stage time breakdown and the slowest pages")
+    build.add_argument("--profile-top", type=int, default=10, metavar="N",
+                       help="how many of the slowest pages to list (default: %(default)s)")
+    build.add_argument("--profile-json", metavar="PATH", help="also write the profile as JSON")
+    build.add_argument("--cprofile", metavar="PATH",
+                       help="write cProfile stats for the main process (workers aren't included)")
+    build.set_defaults(run=run_build)
+
+    serve = commands.add_parser("serve", help="build, then serve the output over HTTP",
+                                description="Serve docs/, optionally rebuilding on change")
+    serve.add_argument("basepath", nargs='?', default='/')
+    add_path_options(serve, content=True, static=True, template=True)
+    add_filter_options(serve)
+    serve.add_argument("--port", type=int, default=8888)
+    serve.add_argument("--watch", action="store_true",
+                       help="poll the content, static files and template and re-render what changed")
+    serve.add_argument("--interval", type=float, default=0.2, help="seconds between polls")
+    serve.set_defaults(run=run_serve)
+
+    check = commands.add_parser("check", help="check the links of the last build",
+                                description="Report internal links and images that point nowhere, "
+                                            "from the build index the last build left")
+    add_path_options(check, content=True)
+    check.set_defaults(run=run_check)
+
+    batch = commands.add_parser("batch", help="render pages from a JSON Lines stream",
+                                description='Render pages from JSON Lines records, {"path": ..., '
+                                            '"markdown": ..., "title": ...} with title optional, '
+                                            'straight into docs/. These pages aren\'t in the build '
+                                            'manifest, so a full rebuild into the same output prunes them')
+    batch.add_argument("input", nargs='?', default='-', help='JSON Lines file, "-" for stdin (default)')
+    batch.add_argument("basepath", nargs='?', default='/')
+    add_path_options(batch, template=True)
+    batch.add_argument("-j", "--jobs", type=int, default=1,
+                       help="render records across N processes (0 = one per CPU)")
+    add_cache_options(batch)
+    add_io_threads_option(batch)
+    add_minify_option(batch)
+    batch.set_defaults(run=run_batch)
+    return parser
+
+def add_path_options(parser, content=False, static=False, template=False):
+    # --output always, the others for the subcommands that read them
+    if content:
+        parser.add_argument("--content", default="content", metavar="DIR",
+                            help="markdown sources (default: %(default)s)")
+    if static:
+        parser.add_argument("--static", default="static", metavar="DIR",
+                            help="files copied into the output as they are (default: %(default)s)")
+    if template:
+        parser.add_argument("--template", default="template.html", metavar="PATH",
+                            help="page template (default: %(default)s)")
+    parser.add_argument("--output", default="docs", metavar="DIR",
+                        help="where the site is written (default: %(default)s)")
+
+def add_cache_options(parser):
+    parser.add_argument("--cache", default=".cache/blocks.sqlite3",
+                        help="on-disk cache of rendered blocks (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="render every block from scratch")
+    parser.add_argument("--cache-size", type=int, default=256,
+                        help="trim the block cache to this many MB after a build (default: %(default)s)")
+
+def add_io_threads_option(parser):
+    parser.add_argument("--io-threads", type=int, default=8,
+                        help="read sources and write pages on N threads at once (default: %(default)s)")
+
+def add_minify_option(parser):
+    parser.add_argument("--minify", action="store_true",
+                        help="drop insignificant whitespace from pages and the template as they're "
+                             "written; code blocks are left as they are")
+
+def add_filter_options(parser):
+    parser.add_argument("--include", action="append", default=[], metavar="GLOB",
+                        help="only build pages matching GLOB; other pages and static files are "
+                             "left as they are (repeatable)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help='skip files and directories matching GLOB, e.g. "drafts" (repeatable)')
+    parser.add_argument("--include-hidden", action="store_true",
+                        help="don't skip files and directories whose name starts with a dot")
+
+def run_build(args):
+    from build import build_site, create_paths
+    from profiling import profiler
+    from walk import PathFilter
+
+    profiler.enabled = args.profile or bool(args.profile_json)
+    if args.cprofile:
+        import cProfile
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+    start = time.perf_counter()
+
+    create_paths((args.static, args.content, args.output))
+    failed = build_site(args.content, args.static, args.template, args.output, args.basepath, args.jobs,
+                        None if args.no_cache else args.cache, args.cache_size << 20, args.io_threads,
+                        args.static_sync, args.static_compare,
+                        PathFilter(args.include, args.exclude, args.include_hidden), args.minify,
+                        args.compress)
+    links_ok = True
+    if args.check_links:
+        from linkcheck import check_links
+        with profiler.stage("check links"):
+            links_ok = check_links(args.content, args.output)
+
+    wall_seconds = time.perf_counter() - start
+    if args.cprofile:
+        cprofile.disable()
+        cprofile.dump_stats(args.cprofile)
+    if args.profile:
+        profiler.report(wall_seconds, args.profile_top)
+    if args.profile_json:
+        profiler.dump_json(args.profile_json, wall_seconds)
+    return 1 if failed or not links_ok else 0
+
+def run_serve(args):
+    from server import run
+    from walk import PathFilter
+    run(args.content, args.static, args.template, args.output, args.basepath, args.port, args.watch,
+        args.interval, PathFilter(args.include, args.exclude, args.include_hidden))
     return 0
 
-main()
+def run_check(args):
+    from linkcheck import check_links
+    return 0 if check_links(args.content, args.output) else 1
+
+def run_batch(args):
+    from batch import generate_batch
+    options = (args.template, args.output, args.basepath, args.jobs,
+               None if args.no_cache else args.cache, args.cache_size << 20, args.io_threads, args.minify)
+    if args.input == '-':
+        failed = generate_batch(sys.stdin.buffer, "<stdin>", *options)
+    else:
+        with open(args.input, 'rb') as f:
+            failed = generate_batch(f, args.input, *options)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
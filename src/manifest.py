@@ -0,0 +1,57 @@
+import hashlib, json, os
+from walk import walk_files, DEFAULT_FILTER
+from fileio import replacing
+
+MANIFEST_VERSION = 1
+
+def manifest_path(dest_path):
+    # Lives next to the output tree ("docs" -> "docs.manifest.json") so that
+    # wiping the output directory doesn't take the manifest with it
+    return f'{dest_path.rstrip("/")}.manifest.json'
+
+def load_manifest(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def save_manifest(path, manifest):
+    with replacing(path) as tmp_path:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_entry(path, previous=None, st=None):
+    # Only re-hash when size or mtime moved, an untouched file costs one stat
+    st = st or os.stat(path)
+    if previous and previous["size"] == st.st_size and previous["mtime"] == st.st_mtime_ns:
+        return previous
+    return {"hash": hash_file(path), "size": st.st_size, "mtime": st.st_mtime_ns}
+
+def scan_files(root, previous=None, suffix='', path_filter=DEFAULT_FILTER):
+    previous = previous or {}
+    return {key: file_entry(entry.path, previous.get(key), entry.stat())
+            for key, entry in walk_files(root, path_filter, suffix)}
+
+def diff_entries(old_entries, new_entries):
+    changed = [key for key, entry in new_entries.items()
+               if key not in old_entries or old_entries[key]["hash"] != entry["hash"]]
+    removed = [key for key in old_entries if key not in new_entries]
+    return changed, removed
+
+def needs_full_rebuild(old, new):
+    if old is None:
+        return True
+    if old["basepath"] != new["basepath"] or old.get("minify", False) != new.get("minify", False):
+        return True
+    return old["template"]["hash"] != new["template"]["hash"]
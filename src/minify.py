@@ -0,0 +1,59 @@
+import re
+
+TAG = re.compile(r'<(/?)([A-Za-z!][^\s/>]*)[^>]*?(/?)>')
+# HTML's whitespace only: \s would also take U+00A0 and other spaces that
+# render
+SPACES = ' \t\n\r\f'
+WHITESPACE = re.compile(r'[ \t\n\r\f]+')
+# Whitespace inside these is content, not layout
+PRESERVE = {"pre", "code", "textarea", "script", "style"}
+# Whitespace next to these never renders, so it can go entirely. Anywhere
+# else a run of whitespace still shows as one space and is kept as one
+BLOCK_TAGS = {
+    "!doctype", "html", "head", "body", "title", "meta", "link", "script", "style", "base",
+    "article", "aside", "footer", "header", "main", "nav", "section", "div", "p", "hr", "br",
+    "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "dl", "dt", "dd", "blockquote",
+    "pre", "figure", "figcaption", "table", "thead", "tbody", "tfoot", "tr", "th", "td",
+}
+
+def minify_html(html):
+    # Collapses insignificant whitespace in a fragment of HTML. Text inside
+    # PRESERVE tags comes out untouched, as do tags and their attributes
+    out = []
+    pos = 0
+    preserve = 0
+    before = None
+    for match in TAG.finditer(html):
+        name = match.group(2).lower()
+        if match.start() > pos:
+            text = html[pos:match.start()]
+            out.append(text if preserve else collapse(text, before, name))
+        out.append(match.group())
+        if name in PRESERVE and not match.group(3):
+            preserve = max(0, preserve - 1) if match.group(1) else preserve + 1
+        before = name
+        pos = match.end()
+    if pos < len(html):
+        text = html[pos:]
+        out.append(text if preserve else collapse(text, before, None))
+    return ''.join(out)
+
+def collapse(text, before, after):
+    # before and after are the names of the tags either side of text, if any
+    if before in BLOCK_TAGS:
+        text = text.lstrip(SPACES)
+    if after in BLOCK_TAGS:
+        text = text.rstrip(SPACES)
+    return WHITESPACE.sub(' ', text)
+
+class Minifier():
+    # minify_html that keeps count of the bytes it saved, as UTF-8
+    __slots__ = ("saved",)
+
+    def __init__(self):
+        self.saved = 0
+
+    def __call__(self, html):
+        minified = minify_html(html)
+        self.saved += len(html.encode('utf-8')) - len(minified.encode('utf-8'))
+        return minified
@@ -2,10 +2,21 @@ import re
 from textnode import TextNode, TextType, BlockType
 from htmlnode import *
 
+INLINE_DELIMITERS = re.compile(r'\*\*|_|`')
+IMAGE_PATTERN = re.compile(r'!\[(.*?)\]\((.*?)\)')
+LINK_PATTERN = re.compile(r'(?<!\!)\[(.*?)\]\((.*?)\)')
+HEADING_MARKER = re.compile(r'#{1,6} ')
+CODE_BLOCK = re.compile(r'(`{3})(.*)(`{3})$', re.DOTALL)
+QUOTE_BREAK = re.compile(r'\n(?!>)')
+ORDERED_MARKER = re.compile(r"^\d+\.\s", re.M)
+BLOCK_SEPARATOR = re.compile(r'\n+\n')
+# Mapped sources are never newline-translated, so CRLF is split on too
+BLOCK_SEPARATOR_BYTES = re.compile(rb'(?:\r?\n)+\r?\n')
+
 class UnbalancedDelimiters(Exception):
     pass
 
-def p_text_node_to_html_node(text_node):
+def p_text_node_to_html_node(text_node, basepath='/'):
     if not isinstance(text_node, TextNode):
         raise ValueError("p_text_node_to_html_node expects TextNode object")
 
@@ -19,12 +30,18 @@ def p_text_node_to_html_node(text_node):
         case TextType.CODE_TEXT:
             return LeafNode("code", text_node.text)
         case TextType.LINK_ANCHOR_TEXT_URL:
-            return LeafNode('a', text_node.text, {"href": text_node.url})
+            return LeafNode('a', text_node.text, {"href": p_rebase_url(text_node.url, basepath)})
         case TextType.IMAGE_ALT_TEXT_URL:
-            return LeafNode("img", '', {"src": text_node.url, "alt": text_node.text})
+            return LeafNode("img", '', {"src": p_rebase_url(text_node.url, basepath), "alt": text_node.text})
         case _:
             raise TypeError("Invalid text type")
 
+def p_rebase_url(url, basepath):
+    # Root-relative targets move under the basepath the site is served from
+    if basepath != '/' and url.startswith('/'):
+        return basepath + url[1:]
+    return url
+
 def p_split_text_nodes(old_nodes, delimiter, text_type):
     if delimiter == '':
         return old_nodes
@@ -52,132 +69,194 @@ def p_split_text_nodes(old_nodes, delimiter, text_type):
     return new_nodes
 
 def p_extract_md_images(md_string):
-    return re.findall(r'!\[(.*?)\]\((.*?)\)', md_string)
+    return IMAGE_PATTERN.findall(md_string)
 
 def p_extract_md_links(md_string):
-    return re.findall(r'(?<!\!)\[(.*?)\]\((.*?)\)', md_string)
+    return LINK_PATTERN.findall(md_string)
 
 def p_split_image_nodes(old_nodes):
-    # TODO: Validate input
-    new_nodes = []
-
-    for node in old_nodes:
-        if node.text_type == TextType.PLAIN_TEXT:
-            input = node.text
-            img_extract = p_extract_md_images(input)
-            if not img_extract: 
-                new_nodes.append(node)
-                continue
-
-            next = input.split(f'![{img_extract[0][0]}]({img_extract[0][1]})', 1)
-            if len(next) > 0: # Check for splits
-                for i in range(0, len(img_extract)):
-                    if i != 0:
-                        next = next.split(f'![{img_extract[i][0]}]({img_extract[i][1]})', 1)
-                    if next[0] != '':
-                        new_nodes.append(TextNode(next[0], TextType.PLAIN_TEXT))
-                    new_nodes.append(TextNode(img_extract[i][0], TextType.IMAGE_ALT_TEXT_URL, img_extract[i][1]))
-                    if len(next) > 1: 
-                        next = next[1] 
-
-                if next != '':
-                    new_nodes.append(TextNode(next, TextType.PLAIN_TEXT))
-        else:
-            new_nodes.append(node)
-    return new_nodes
+    return p_split_pattern_nodes(old_nodes, IMAGE_PATTERN, TextType.IMAGE_ALT_TEXT_URL)
  
 def p_split_link_nodes(old_nodes):
-    # TODO: Validate input
-    new_nodes = []
+    return p_split_pattern_nodes(old_nodes, LINK_PATTERN, TextType.LINK_ANCHOR_TEXT_URL)
 
+def p_split_pattern_nodes(old_nodes, pattern, text_type):
+    new_nodes = []
     for node in old_nodes:
-        if node.text_type == TextType.PLAIN_TEXT:
-            input = node.text
-            link_extract = p_extract_md_links(input)
-            if not link_extract: 
-                new_nodes.append(node)
-                continue
-
-            next = re.split(fr'(?<!\!)\[{link_extract[0][0]}\]\({link_extract[0][1]}\)', input, maxsplit=1)
-            if len(next) > 0: # Check for splits
-                for i in range(0, len(link_extract)):
-                    if i != 0:
-                        next = re.split(fr'(?<!\!)\[{link_extract[i][0]}\]\({link_extract[i][1]}\)', next, maxsplit=1) 
-                    if next[0] != '':
-                        new_nodes.append(TextNode(next[0], TextType.PLAIN_TEXT))
-                    new_nodes.append(TextNode(link_extract[i][0], TextType.LINK_ANCHOR_TEXT_URL, link_extract[i][1]))
-                    if len(next) > 1: 
-                        next = next[1] 
-
-                if next != '':
-                    new_nodes.append(TextNode(next, TextType.PLAIN_TEXT))
-        else:
+        if node.text_type != TextType.PLAIN_TEXT or '[' not in node.text:
+            new_nodes.append(node)
+            continue
+        count = len(new_nodes)
+        p_append_matches(new_nodes, node.text, pattern, text_type)
+        if len(new_nodes) == count:
             new_nodes.append(node)
     return new_nodes
 
+def p_append_matches(nodes, text, pattern, text_type):
+    # One finditer pass; the text between matches is sliced out by position
+    # instead of re-splitting the remainder for every match
+    pos = 0
+    for match in pattern.finditer(text):
+        if match.start() > pos:
+            nodes.append(TextNode(text[pos:match.start()], TextType.PLAIN_TEXT))
+        nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+        pos = match.end()
+    if pos < len(text):
+        nodes.append(TextNode(text[pos:], TextType.PLAIN_TEXT))
+
 def p_text_to_text_nodes(text):
-    raw_text_node = [TextNode(text, TextType.PLAIN_TEXT)]
-    nodes = p_split_text_nodes(raw_text_node, "**", TextType.BOLD_TEXT)
-    nodes = p_split_text_nodes(nodes, "_", TextType.ITALIC_TEXT)
-    nodes = p_split_text_nodes(nodes, "`", TextType.CODE_TEXT)
-    nodes = p_split_image_nodes(nodes)
-    nodes = p_split_link_nodes(nodes)
+    # Single left-to-right scan over the delimiters. Nesting follows the order the
+    # old split passes ran in: code beats italic beats bold, and images/links are
+    # only picked out of plain text
+    nodes = []
+    bold = italic = code = False
+    pos = 0
+    for match in INLINE_DELIMITERS.finditer(text):
+        p_append_inline(nodes, text[pos:match.start()], bold, italic, code)
+        delimiter = match.group()
+        if delimiter == '`' and code and match.start() == pos:
+            # The old split passes kept empty code spans, keep rendering them
+            nodes.append(TextNode('', TextType.CODE_TEXT))
+        if delimiter == '**':
+            bold = not bold
+        elif delimiter == '_':
+            italic = not italic
+        else:
+            code = not code
+        pos = match.end()
+    p_append_inline(nodes, text[pos:], bold, italic, code)
+
+    if bold or italic or code:
+        raise UnbalancedDelimiters(f'Error: "{text}" has unbalanced delimiters')
     return nodes
 
+def p_append_inline(nodes, text, bold, italic, code):
+    if text == '':
+        return
+    if code:
+        nodes.append(TextNode(text, TextType.CODE_TEXT))
+    elif italic:
+        nodes.append(TextNode(text, TextType.ITALIC_TEXT))
+    elif bold:
+        nodes.append(TextNode(text, TextType.BOLD_TEXT))
+    else:
+        p_append_plain(nodes, text)
+
+def p_append_plain(nodes, text):
+    if '[' not in text:
+        nodes.append(TextNode(text, TextType.PLAIN_TEXT))
+        return
+    # Images first, then links in the gaps between them
+    pos = 0
+    for match in IMAGE_PATTERN.finditer(text):
+        p_append_matches(nodes, text[pos:match.start()], LINK_PATTERN, TextType.LINK_ANCHOR_TEXT_URL)
+        nodes.append(TextNode(match.group(1), TextType.IMAGE_ALT_TEXT_URL, match.group(2)))
+        pos = match.end()
+    p_append_matches(nodes, text[pos:], LINK_PATTERN, TextType.LINK_ANCHOR_TEXT_URL)
+
+def replace_md_block_format(tag, md_string):
+    match tag:
+        case 'p' | BlockType.PARAGRAPH:
+            return md_string
+        case "code" | BlockType.CODE:
+            return md_string.strip("```")
+        case "blockquote" | BlockType.QUOTE:
+            return md_string[2:].replace("\n>", '\n')
+        case "ul" | BlockType.UNORDERED_LIST:
+            return md_string.lstrip("- ").replace("\n- ", '\n')
+        case "ol" | BlockType.ORDERED_LIST:
+            return ORDERED_MARKER.sub('', md_string)
+        case _:
+            if tag[0] == 'h' or tag == BlockType.HEADING:
+                return md_string.lstrip("# ")
+            return md_string
+
+def p_normalize_newlines(text):
+    # What reading in text mode would have done to CRLF line endings, for
+    # sources read or mapped as bytes
+    return text.replace('\r\n', '\n') if '\r' in text else text
+
 def p_markdown_to_blocks(text):
     if not isinstance(text, str):
         raise TypeError
-    blocks = re.split(r'\n+\n', text)
+    blocks = BLOCK_SEPARATOR.split(text)
     blocks = [block.strip() for block in blocks]
     blocks = list(filter(lambda x: x!='', blocks))
     return blocks 
 
+def p_iter_block_spans(buf):
+    # (start, end) offsets of the raw pieces p_markdown_to_blocks splits
+    # into, found lazily in a string or a bytes-like source such as an mmap.
+    # '\n' never occurs inside a multi-byte UTF-8 character, so byte offsets
+    # are always safe to decode between
+    separator = BLOCK_SEPARATOR if isinstance(buf, str) else BLOCK_SEPARATOR_BYTES
+    start = 0
+    for match in separator.finditer(buf):
+        yield start, match.start()
+        start = match.end()
+    yield start, len(buf)
+
+def p_iter_blocks(buf):
+    # Lazy p_markdown_to_blocks: each block is only sliced out (and decoded,
+    # for bytes) and stripped when it's consumed
+    for _, block in p_iter_numbered_blocks(buf):
+        yield block
+
+def p_iter_numbered_blocks(buf):
+    # p_iter_blocks, with the source line (from 1) each block starts on
+    decode = not isinstance(buf, str)
+    line = 1
+    end = 0
+    for start, next_end in p_iter_block_spans(buf):
+        # Separators are nothing but line endings
+        line += buf[end:start].count(b'\n' if decode else '\n')
+        end = next_end
+        raw = buf[start:end]
+        raw = p_normalize_newlines(raw.decode('utf-8')) if decode else raw
+        block = raw.strip()
+        if block:
+            yield line + raw.count('\n', 0, raw.find(block[0])), block
+        line += raw.count('\n')
+
 def p_block_to_blocktype(block):
+    # Only one block type can start with any given character, so the first
+    # one picks the single test worth running. Every test is linear in the
+    # length of the block
     if not isinstance(block, str):
         raise TypeError
     if block == '':
         return BlockType.PARAGRAPH
 
-    # Headers
-    if re.match(r'^#{1,6} ', block) is not None:  
-        heading_num = len(re.match(r'^#{1,6} ', block).group()) - 1
-        return (BlockType.HEADING, heading_num)
-
-    # Code Block
-    if re.match(r'^(`{3})(.*)(`{3})$', block, re.DOTALL): 
-        return BlockType.CODE
-
-    # Quote Block
-    if block.startswith('>'):
-        temp = block 
-        temp = temp.split('\n')
-        flag = True 
-        for line in temp:
-            if not line.startswith('>'):
-                flag = False
-        if flag:
-            return BlockType.QUOTE 
-
-    # Unordered List
-    if re.match(r'^(?:- .*\n?)*$', block, re.MULTILINE):
-        return BlockType.UNORDERED_LIST
-    
-    # Ordered List
-    if block.startswith("1. "):
-        temp = block
-        n = 2
-        flag = True
-        while temp.find('\n') != -1:
-            temp = temp[temp.find('\n') + 1:]
-            if temp.startswith(f"{n}. "):
-                n += 1
-            else:
-                flag = False
-                break
-        if flag:
-            return BlockType.ORDERED_LIST 
-
-    # Default Case
+    match block[0]:
+        case '#':
+            heading = HEADING_MARKER.match(block)
+            if heading is not None:
+                return (BlockType.HEADING, len(heading.group()) - 1)
+        case '`':
+            if CODE_BLOCK.match(block):
+                return BlockType.CODE
+        case '>':
+            # Every line has to start with '>'
+            if QUOTE_BREAK.search(block) is None:
+                return BlockType.QUOTE
+        case '-':
+            if block.startswith("- "):
+                return BlockType.UNORDERED_LIST
+        case '1':
+            if block.startswith("1. ") and p_is_numbered(block):
+                return BlockType.ORDERED_LIST
+
     return BlockType.PARAGRAPH
-    
+
+def p_is_numbered(block):
+    # Line n has to start with "n. "
+    n = 2
+    eol = block.find('\n')
+    while eol != -1:
+        if not block.startswith(f'{n}. ', eol + 1):
+            return False
+        n += 1
+        eol = block.find('\n', eol + 1)
+    return True
+
 
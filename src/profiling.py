@@ -0,0 +1,141 @@
+import json, threading
+from time import perf_counter
+
+class Stage():
+    __slots__ = ("profiler", "name", "start", "child")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.child = 0.0
+        self.profiler.stack.append(self)
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        # Stages nest; each one is charged only the time not spent in the
+        # stages inside it, so the breakdown adds up to the wall time
+        elapsed = perf_counter() - self.start
+        stack = self.profiler.stack
+        stack.pop()
+        if stack:
+            stack[-1].child += elapsed
+        self.profiler.add(self.name, elapsed - self.child)
+        return False
+
+class NoStage():
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NO_STAGE = NoStage()
+
+class TimedWriter():
+    def __init__(self, profiler, name, fp):
+        self.profiler = profiler
+        self.name = name
+        self.fp = fp
+
+    def write(self, chunk):
+        with self.profiler.stage(self.name):
+            return self.fp.write(chunk)
+
+class Profiler():
+    def __init__(self):
+        self.enabled = False
+        self.stack = []
+        self.stages = {}  # name -> [seconds, calls]
+        self.pages = []   # [seconds, source bytes, output bytes, path]
+        self.lock = threading.Lock()
+
+    def stage(self, name):
+        if not self.enabled:
+            return NO_STAGE
+        return Stage(self, name)
+
+    def add(self, name, seconds, calls=1):
+        with self.lock:
+            entry = self.stages.get(name)
+            if entry is None:
+                self.stages[name] = [seconds, calls]
+            else:
+                entry[0] += seconds
+                entry[1] += calls
+
+    def call(self, name, fn, *args):
+        # For I/O threads, which can't share the stage stack: the call is timed
+        # on its own, so overlapping calls are each counted in full
+        if not self.enabled:
+            return fn(*args)
+        start = perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.add(name, perf_counter() - start)
+
+    def iter_stage(self, name, iterable):
+        if not self.enabled:
+            return iterable
+        return self.timed_iter(name, iterable)
+
+    def timed_iter(self, name, iterable):
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                chunk = next(iterator, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    def writer(self, name, fp):
+        if not self.enabled:
+            return fp
+        return TimedWriter(self, name, fp)
+
+    def page(self, path, seconds, source_bytes, output_bytes):
+        if self.enabled:
+            self.pages.append([seconds, source_bytes, output_bytes, path])
+
+    def take(self):
+        # Hands the collected numbers over (e.g. from a worker process) and starts afresh
+        data = {"stages": self.stages, "pages": self.pages}
+        self.stages = {}
+        self.pages = []
+        return data
+
+    def merge(self, data):
+        for name, (seconds, calls) in data["stages"].items():
+            self.add(name, seconds, calls)
+        self.pages.extend(data["pages"])
+
+    def report(self, wall_seconds, top=10):
+        total = sum(seconds for seconds, _ in self.stages.values()) or 1
+        print(f'\n{"stage":<16} {"seconds":>9} {"share":>7} {"calls":>9}')
+        for name, (seconds, calls) in sorted(self.stages.items(), key=lambda item: -item[1][0]):
+            print(f'{name:<16} {seconds:>9.3f} {100 * seconds / total:>6.1f}% {calls:>9}')
+        print(f'{"wall time":<16} {wall_seconds:>9.3f}')
+        if self.pages and top:
+            print(f'\n{top} slowest pages:')
+            print(f'{"seconds":>9} {"md KB":>9} {"html KB":>9}  path')
+            for seconds, source_bytes, output_bytes, path in sorted(self.pages, reverse=True)[:top]:
+                print(f'{seconds:>9.4f} {source_bytes / 1e3:>9.1f} {output_bytes / 1e3:>9.1f}  {path}')
+
+    def dump_json(self, path, wall_seconds):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "wall_seconds": wall_seconds,
+                "stages": {name: {"seconds": seconds, "calls": calls}
+                           for name, (seconds, calls) in self.stages.items()},
+                "pages": [{"path": path, "seconds": seconds, "source_bytes": source_bytes,
+                           "output_bytes": output_bytes}
+                          for seconds, source_bytes, output_bytes, path in sorted(self.pages, reverse=True)],
+            }, f, indent=1)
+
+# One per process, switched on by --profile
+profiler = Profiler()
@@ -0,0 +1,158 @@
+import os, threading, time
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from build import build_site, create_paths, render_content, remove_output, md_to_html_path, pjoin
+from fileio import write_bytes
+from template import Template
+from staticsync import sync_file
+from walk import walk_files, DEFAULT_FILTER
+
+class SiteWatcher():
+    # Keeps the template and every rendered page body in memory, so a change
+    # only costs re-parsing the pages that actually moved. A template edit
+    # re-wraps the cached bodies without touching the markdown again
+    def __init__(self, content_path, static_path, template_path, dest_path, basepath,
+                 path_filter=DEFAULT_FILTER):
+        self.content_path = content_path
+        self.static_path = static_path
+        self.template_path = template_path
+        self.dest_path = dest_path
+        self.basepath = basepath
+        self.path_filter = path_filter
+        self.template = None
+        self.pages = {}   # "blog/tom/index.md" -> (title, html_content)
+        self.mtimes = {}  # watched file path -> mtime_ns
+
+    def start(self, watch=True):
+        # When watching, page bodies are cached up front so the first template
+        # edit doesn't have to go back to the markdown either: the ones the
+        # build renders are kept from it, only the rest are parsed here
+        bodies = {} if watch else None
+        build_site(self.content_path, self.static_path, self.template_path,
+                   self.dest_path, self.basepath, path_filter=self.path_filter, bodies=bodies)
+        self.template = self.read_template()
+        self.mtimes = self.scan()
+        if bodies is None:
+            return
+        for from_path, body in bodies.items():
+            self.pages[self.source_key(from_path)[1]] = body
+        for path in self.mtimes:
+            root, key = self.source_key(path)
+            if root == self.content_path and key.endswith(".md") and key not in self.pages:
+                self.load(path, key)
+
+    def read_template(self):
+        with open(self.template_path, 'r', encoding='utf-8') as f:
+            return Template(f.read(), self.basepath)
+
+    def scan(self):
+        mtimes = {}
+        for root, path_filter in ((self.content_path, self.path_filter),
+                                  (self.static_path, self.path_filter.without_include())):
+            for _, entry in walk_files(root, path_filter):
+                try:
+                    mtimes[entry.path] = entry.stat().st_mtime_ns
+                except FileNotFoundError:
+                    pass
+        try:
+            mtimes[self.template_path] = os.stat(self.template_path).st_mtime_ns
+        except FileNotFoundError:
+            pass
+        return mtimes
+
+    def poll(self):
+        mtimes = self.scan()
+        changed = [path for path, mtime in mtimes.items() if self.mtimes.get(path) != mtime]
+        removed = [path for path in self.mtimes if path not in mtimes]
+        self.mtimes = mtimes
+        if not (changed or removed):
+            return 0
+
+        start = time.perf_counter()
+        if self.template_path in changed:
+            changed.remove(self.template_path)
+            self.template = self.read_template()
+            self.rerender_all()
+        for path in removed:
+            self.remove(path)
+        for path in changed:
+            self.update(path)
+        print(f'Rebuilt {len(changed) + len(removed)} files in {(time.perf_counter() - start) * 1000:.1f}ms')
+        return len(changed) + len(removed)
+
+    def source_key(self, path):
+        for root in (self.content_path, self.static_path):
+            if os.path.commonpath([root, path]) == os.path.normpath(root):
+                return root, os.path.relpath(path, root).replace(os.sep, '/')
+        return None, None
+
+    def update(self, path):
+        root, key = self.source_key(path)
+        if root == self.static_path:
+            print(f'Copying "{path}" to "{pjoin(self.dest_path, key)}"')
+            sync_file(path, pjoin(self.dest_path, key))
+        elif root == self.content_path and key.endswith(".md"):
+            print(f'Generating page from "{path}" to "{pjoin(self.dest_path, md_to_html_path(key))}"')
+            if self.load(path, key):
+                self.write(key)
+
+    def load(self, path, key):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.pages[key] = render_content(f.read(), self.basepath)
+        except Exception as e:
+            print(f'Error generating page from "{path}": {type(e).__name__}: {e}')
+            return False
+        return True
+
+    def remove(self, path):
+        root, key = self.source_key(path)
+        if root == self.static_path:
+            remove_output(self.dest_path, key)
+        elif root == self.content_path and key.endswith(".md"):
+            self.pages.pop(key, None)
+            remove_output(self.dest_path, md_to_html_path(key))
+
+    def rerender_all(self):
+        for path in self.mtimes:
+            root, key = self.source_key(path)
+            if root != self.content_path or not key.endswith(".md"):
+                continue
+            if key in self.pages:
+                self.write(key)
+            else:
+                self.update(path)
+
+    def write(self, key):
+        title, html_content = self.pages[key]
+        page = self.template.render_string({"Title": title, "Content": html_content})
+        write_bytes(pjoin(self.dest_path, md_to_html_path(key)), page.encode('utf-8'))
+
+    def watch(self, interval):
+        while True:
+            time.sleep(interval)
+            self.poll()
+
+def serve(dest_path, port):
+    handler = partial(SimpleHTTPRequestHandler, directory=dest_path)
+    httpd = ThreadingHTTPServer(("", port), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    print(f'Serving "{dest_path}" on http://localhost:{port}/')
+    return httpd
+
+def run(content_path, static_path, template_path, dest_path, basepath, port=8888, watch=False,
+        interval=0.2, path_filter=DEFAULT_FILTER):
+    create_paths((static_path, content_path, dest_path))
+    watcher = SiteWatcher(content_path, static_path, template_path, dest_path, basepath, path_filter)
+    watcher.start(watch)
+    httpd = serve(dest_path, port)
+    try:
+        if watch:
+            watcher.watch(interval)
+        else:
+            threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.shutdown()
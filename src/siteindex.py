@@ -0,0 +1,57 @@
+import json
+from fileio import replacing
+
+def index_path(dest_path):
+    # Next to the output tree like the manifest: "docs" -> "docs.index.jsonl"
+    return f'{dest_path.rstrip("/")}.index.jsonl'
+
+class PageInfo():
+    # Collects a page's build index record from the block infos the renderer
+    # hands over (see conversion.block_info) while the page is written
+    __slots__ = ("title", "headings", "links", "images", "words")
+
+    def __init__(self):
+        self.title = None
+        self.headings = []  # [level, text, line]
+        self.links = []     # [url, line]
+        self.images = []    # [url, line]
+        self.words = 0
+
+    def add_block(self, line, info):
+        if "heading" in info:
+            self.headings.append(info["heading"] + [line])
+        for url, offset in info.get("links", ()):
+            self.links.append([url, line + offset])
+        for url, offset in info.get("images", ()):
+            self.images.append([url, line + offset])
+        self.words += info.get("words", 0)
+
+    def record(self, path, output):
+        return {
+            "path": path,
+            "output": output,
+            "title": self.title,
+            "headings": self.headings,
+            "links": self.links,
+            "images": self.images,
+            "words": self.words,
+        }
+
+def load_index(path):
+    # {source path: record}, or None if there's no usable index
+    records = {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                records[record["path"]] = record
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        return None
+    return records
+
+def save_index(path, records):
+    # One JSON object per line, sorted by source path
+    with replacing(path) as tmp_path:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for key in sorted(records):
+                f.write(json.dumps(records[key], ensure_ascii=False, separators=(',', ':')) + '\n')
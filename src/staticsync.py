@@ -0,0 +1,99 @@
+import os, shutil
+from manifest import hash_file
+from fileio import replacing
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+SYNC_MODES = ("auto", "reflink", "hardlink", "copy")
+COMPARE_MODES = ("mtime", "hash")
+
+FICLONE = 0x40049409  # linux/fs.h
+
+def sync_static(static_path, dest_path, entries, mode="auto", compare="mtime"):
+    # entries is the manifest's {path: {"hash","size","mtime"}} for the files
+    # to bring over. Outputs that already match are left alone, so a full
+    # rebuild costs one stat per unchanged asset instead of a copy.
+    # Returns {method: count} with "unchanged" for the skipped files
+    counts = {}
+    for path, entry in entries.items():
+        src, dest = os.path.join(static_path, path), os.path.join(dest_path, path)
+        if is_current(dest, entry, compare):
+            method = "unchanged"
+        else:
+            print(f'Copying "{src}" to "{dest}"')
+            method = sync_file(src, dest, mode)
+        counts[method] = counts.get(method, 0) + 1
+    return counts
+
+def is_current(dest, entry, compare="mtime"):
+    try:
+        st = os.stat(dest)
+    except FileNotFoundError:
+        return False
+    if st.st_size != entry["size"]:
+        return False
+    if compare == "hash":
+        return hash_file(dest) == entry["hash"]
+    # Copies keep the source's mtime and links share it
+    return st.st_mtime_ns == entry["mtime"]
+
+def sync_file(src, dest, mode="auto"):
+    # Puts src at dest via a temporary name, using the cheapest method the
+    # mode and filesystem allow, and returns which one was used
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    with replacing(dest) as tmp_path:
+        if mode == "hardlink" and link_file(src, tmp_path):
+            method = "hardlink"
+        else:
+            method = clone_file(src, tmp_path) if mode != "copy" else None
+            if method is None:
+                method = "copy"
+                shutil.copyfile(src, tmp_path)
+            shutil.copystat(src, tmp_path)
+    return method
+
+def link_file(src, dest):
+    # Shares the inode, so no bytes move at all. Fails across filesystems
+    try:
+        os.link(src, dest)
+        return True
+    except OSError:
+        return False
+
+def clone_file(src, dest):
+    # FICLONE shares the source's blocks copy-on-write (btrfs, XFS, bcachefs).
+    # Failing that, copy_file_range keeps the copy inside the kernel, where
+    # many filesystems turn it into a reflink or a server-side copy anyway.
+    # Returns the method that worked, or None for a plain copy
+    with open(src, 'rb') as fsrc, open(dest, 'wb') as fdst:
+        if fcntl is not None:
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                return "reflink"
+            except OSError:
+                pass
+        if hasattr(os, "copy_file_range"):
+            try:
+                while os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30):
+                    pass
+                return "copy_file_range"
+            except OSError:
+                fdst.truncate(0)
+    os.remove(dest)
+    return None
+
+def prune_output(dest_path, keep):
+    # Deletes every file under dest_path whose relative path isn't in keep,
+    # then any directories left empty. Returns the removed paths
+    removed = []
+    for dirpath, dirnames, filenames in os.walk(dest_path, topdown=False):
+        for filename in filenames:
+            full_path = os.path.join(dirpath, filename)
+            if os.path.relpath(full_path, dest_path).replace(os.sep, '/') not in keep:
+                os.remove(full_path)
+                removed.append(full_path)
+        if os.path.normpath(dirpath) != os.path.normpath(dest_path) and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+    return removed
@@ -0,0 +1,50 @@
+import re
+from minify import Minifier
+
+PLACEHOLDER = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+class Template():
+    # template.html compiled once per build: the text between placeholders is
+    # stored as static segments with the basepath rewrite already applied, and
+    # each page is assembled by writing segments and slot values in order.
+    # With minify the static segments are minified, saving self.saved bytes
+    # on every page
+    def __init__(self, template_file, basepath='/', minify=False):
+        template_file = template_file.replace('href="/', f'href="{basepath}'
+                                    ).replace('src="/', f'src="{basepath}')
+        self.segments = []  # (text, None) for static text, (placeholder, name) for slots
+        pos = 0
+        for match in PLACEHOLDER.finditer(template_file):
+            if match.start() > pos:
+                self.segments.append((template_file[pos:match.start()], None))
+            self.segments.append((match.group(), match.group(1)))
+            pos = match.end()
+        if pos < len(template_file):
+            self.segments.append((template_file[pos:], None))
+        self.saved = 0
+        if minify:
+            minifier = Minifier()
+            self.segments = [(minifier(text), None) if name is None else (text, name)
+                             for text, name in self.segments]
+            self.saved = minifier.saved
+
+    def slots(self):
+        return [name for _, name in self.segments if name is not None]
+
+    def iter_render(self, values):
+        # Values are strings, or callables returning an iterable of chunks for
+        # content that should be streamed. Unknown placeholders are left as is
+        for text, name in self.segments:
+            if name is None or name not in values:
+                yield text
+            elif callable(values[name]):
+                yield from values[name]()
+            else:
+                yield values[name]
+
+    def render(self, fp, values):
+        for chunk in self.iter_render(values):
+            fp.write(chunk)
+
+    def render_string(self, values):
+        return ''.join(self.iter_render(values))
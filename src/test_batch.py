@@ -0,0 +1,70 @@
+import io
+import json
+import os
+import unittest
+from contextlib import redirect_stdout
+
+from batch import generate_batch, output_path
+from tempdir import TempDirTestCase
+
+TEMPLATE = '<html><title>{{ Title }}</title><body>{{ Content }}</body></html>'
+
+
+class TestBatch(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.template = self.write("template.html", TEMPLATE)
+        self.docs = self.path("docs")
+
+    def batch(self, lines, jobs=1):
+        stream = io.BytesIO(''.join(line + '\n' for line in lines).encode('utf-8'))
+        with redirect_stdout(io.StringIO()) as out:
+            failed = generate_batch(stream, "export.jsonl", self.template, self.docs, '/site/', jobs)
+        return failed, out.getvalue()
+
+    def test_records_are_rendered(self):
+        failed, _ = self.batch([
+            json.dumps({"path": "blog/post.md", "markdown": "# Post\n\nsee [home](/)"}),
+            "",
+            json.dumps({"path": "notes/a", "markdown": "just **text**", "title": "A note"}),
+        ])
+        self.assertListEqual(failed, [])
+        self.assertEqual(self.read("docs/blog/post.html"),
+                         '<html><title>Post</title><body><div><h1>Post</h1>'
+                         '<p>see <a href="/site/">home</a></p></div></body></html>')
+        self.assertEqual(self.read("docs/notes/a.html"),
+                         '<html><title>A note</title><body><div><p>just <b>text</b></p></div></body></html>')
+
+    def test_bad_records_are_reported(self):
+        failed, out = self.batch([
+            '{"path": "a.md"',
+            json.dumps({"path": "../escape.md", "markdown": "# x"}),
+            json.dumps({"path": "b.md", "markdown": 3}),
+            json.dumps({"path": "c.md", "markdown": "# C\n\n**unbalanced"}),
+            json.dumps({"path": "ok.md", "markdown": "# OK"}),
+        ])
+        self.assertListEqual(failed, ["export.jsonl:1", "export.jsonl:2", "export.jsonl:3", "export.jsonl:4"])
+        self.assertIn('Error in record "export.jsonl:2"', out)
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "ok.html")))
+        self.assertFalse(os.path.exists(self.path("escape.html")))
+
+    def test_parallel_matches_serial(self):
+        lines = [json.dumps({"path": f'p{i}.md', "markdown": f'# Page {i}\n\n- item _{i}_'}) for i in range(20)]
+        self.batch(lines)
+        serial = [self.read(f'docs/p{i}.html') for i in range(20)]
+        failed, _ = self.batch(lines, jobs=2)
+        self.assertListEqual(failed, [])
+        self.assertListEqual([self.read(f'docs/p{i}.html') for i in range(20)], serial)
+
+    def test_output_path(self):
+        self.assertEqual(output_path("blog/./post.md"), "blog/post.html")
+        self.assertEqual(output_path("blog/x/../index"), "blog/index.html")
+        self.assertEqual(output_path("index.html"), "index.html")
+        for path in ("/etc/passwd", "..", "../a.md", "a/../../b", "."):
+            with self.assertRaises(ValueError):
+                output_path(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,234 @@
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+
+import build
+from build import build_site, generate_pages, extract_title, extract_title_bytes
+from linkcheck import check_links
+from siteindex import load_index
+from tempdir import TempDirTestCase
+from walk import PathFilter
+
+TEMPLATE = '<html><title>{{ Title }}</title><link href="/index.css"><body>{{ Content }}</body></html>'
+
+
+class TestBuild(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", TEMPLATE)
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home\n\nSee [post](/blog/post)")
+        self.write("content/blog/post/index.md", "# Post\n\n**bold** text")
+
+    def build(self, basepath='/', jobs=1, compress=False, minify=False, path_filter=PathFilter()):
+        with redirect_stdout(io.StringIO()) as out:
+            failed = build_site(self.path("content"), self.path("static"),
+                                self.path("template.html"), self.path("docs"), basepath, jobs,
+                                path_filter=path_filter, minify=minify, compress=compress)
+        return failed, out.getvalue()
+
+    def test_full_build(self):
+        failed, _ = self.build('/site/')
+        self.assertListEqual(failed, [])
+        self.assertEqual(self.read("docs/index.css"), "body {}")
+        self.assertEqual(
+            self.read("docs/index.html"),
+            '<html><title>Home</title><link href="/site/index.css"><body><div><h1>Home</h1>'
+            '<p>See <a href="/site/blog/post">post</a></p></div></body></html>',
+        )
+
+    def test_incremental_build(self):
+        self.build()
+        _, out = self.build()
+        self.assertIn("Nothing to do", out)
+
+        self.write("content/blog/post/index.md", "# Post\n\nedited")
+        _, out = self.build()
+        self.assertIn("blog/post/index.md", out)
+        self.assertNotIn("content/index.md", out)
+        self.assertIn("edited", self.read("docs/blog/post/index.html"))
+
+        os.remove(self.path("content/blog/post/index.md"))
+        self.build()
+        self.assertFalse(os.path.exists(self.path("docs/blog")))
+        self.assertTrue(os.path.exists(self.path("docs/index.html")))
+
+    def test_index_is_kept_up_to_date(self):
+        self.build()
+        index = load_index(self.path("docs.index.jsonl"))
+        self.assertListEqual(sorted(index), ["blog/post/index.md", "index.md"])
+        self.assertEqual(index["index.md"]["title"], "Home")
+        self.assertEqual(index["index.md"]["output"], "index.html")
+        self.assertListEqual(index["index.md"]["links"], [["/blog/post", 3]])
+
+        self.write("content/blog/post/index.md", "# Post\n\n## Part\n\nline\n![pic](/p.png) and more words")
+        self.write("content/new.md", "# New")
+        os.remove(self.path("content/index.md"))
+        self.build()
+        index = load_index(self.path("docs.index.jsonl"))
+        self.assertListEqual(sorted(index), ["blog/post/index.md", "new.md"])
+        post = index["blog/post/index.md"]
+        self.assertListEqual(post["headings"], [[1, "Post", 1], [2, "Part", 3]])
+        self.assertListEqual(post["images"], [["/p.png", 6]])
+        self.assertEqual(post["words"], 6)
+
+        os.remove(self.path("docs.index.jsonl"))
+        _, out = self.build()
+        self.assertIn("new.md", out)
+        self.assertEqual(len(load_index(self.path("docs.index.jsonl"))), 2)
+
+    def test_check_links(self):
+        self.build('/site/')
+        with redirect_stdout(io.StringIO()) as out:
+            self.assertTrue(check_links(self.path("content"), self.path("docs")))
+        self.write("content/blog/post/index.md", "# Post\n\n[home](/)\n\n![gone](/images/gone.png)")
+        self.build('/site/')
+        with redirect_stdout(io.StringIO()) as out:
+            self.assertFalse(check_links(self.path("content"), self.path("docs")))
+        self.assertIn(f'{self.path("content/blog/post/index.md")}:5: broken link "/images/gone.png"',
+                      out.getvalue())
+
+    def test_compressed_copies_follow_their_page(self):
+        self.write("content/blog/post/index.md", "# Post\n\n" + "words " * 500)
+        self.build(compress=True)
+        self.assertTrue(os.path.exists(self.path("docs/blog/post/index.html.gz")))
+        self.build('/site/', compress=True)
+        self.assertTrue(os.path.exists(self.path("docs/blog/post/index.html.gz")))
+        # A build without compression doesn't leave a stale copy behind
+        self.write("content/blog/post/index.md", "# Post\n\n" + "other words " * 500)
+        self.build('/site/')
+        self.assertFalse(os.path.exists(self.path("docs/blog/post/index.html.gz")))
+
+    def test_minify_change_rebuilds_everything(self):
+        self.write("template.html", TEMPLATE.replace("<body>", "\n  <body>\n    "))
+        self.build()
+        _, out = self.build(minify=True)
+        self.assertIn("content/index.md", out)
+        self.assertIn("Minify: 16 bytes saved", out)
+        self.assertNotIn("\n", self.read("docs/index.html"))
+
+    def test_minify_is_counted_without_an_index(self):
+        self.write("template.html", TEMPLATE.replace("<body>", "\n  <body>\n    "))
+        with redirect_stdout(io.StringIO()) as out:
+            failed = generate_pages([(self.path("content/index.md"), self.path("docs/index.html"))],
+                                    self.path("template.html"), '/', minify=True)
+        self.assertListEqual(failed, [])
+        self.assertIn("Minify: 8 bytes saved", out.getvalue())
+
+    def test_include_leaves_other_outputs_alone(self):
+        self.build()
+        self.write("template.html", TEMPLATE.replace("<body>", "<body class=new>"))
+        self.write("content/blog/post/index.md", "# Post\n\nedited")
+        _, out = self.build(path_filter=PathFilter(include=["blog/*"]))
+        self.assertNotIn("Removing", out)
+        self.assertNotIn("content/index.md", out)
+        self.assertEqual(self.read("docs/index.css"), "body {}")
+        self.assertNotIn("class=new", self.read("docs/index.html"))
+        self.assertIn("class=new", self.read("docs/blog/post/index.html"))
+        self.assertListEqual(sorted(load_index(self.path("docs.index.jsonl"))), ["blog/post/index.md", "index.md"])
+        # The page left out of the template change is caught up by the next full build
+        _, out = self.build()
+        self.assertIn("content/index.md", out)
+        self.assertNotIn("blog/post/index.md", out)
+        self.assertIn("class=new", self.read("docs/index.html"))
+
+    def test_include_without_manifest_leaves_other_outputs_alone(self):
+        # As in a fresh checkout, where the output is there but its manifest isn't
+        self.build()
+        os.remove(self.path("docs.manifest.json"))
+        _, out = self.build(path_filter=PathFilter(include=["blog/*"]))
+        self.assertNotIn("Removing", out)
+        self.assertNotIn("content/index.md", out)
+        self.assertIn("blog/post/index.md", out)
+        self.assertTrue(os.path.exists(self.path("docs/index.html")))
+        self.assertEqual(self.read("docs/index.css"), "body {}")
+        # Nothing says the pages left out are current, so the next full build renders them
+        _, out = self.build()
+        self.assertIn("content/index.md", out)
+        self.assertNotIn("blog/post/index.md", out)
+
+    def test_basepath_change_rebuilds_everything(self):
+        self.build()
+        _, out = self.build('/site/')
+        self.assertIn("content/index.md", out)
+        self.assertIn("blog/post/index.md", out)
+
+    def test_parallel_matches_serial(self):
+        self.build(jobs=1)
+        serial = self.read("docs/index.html"), self.read("docs/blog/post/index.html")
+        os.remove(self.path("docs.manifest.json"))
+        self.build(jobs=2)
+        parallel = self.read("docs/index.html"), self.read("docs/blog/post/index.html")
+        self.assertEqual(serial, parallel)
+
+    def test_errors_are_reported_per_file(self):
+        self.write("content/bad.md", "# Bad\n\n**unbalanced")
+        with redirect_stdout(io.StringIO()) as out:
+            failed = generate_pages([(self.path("content/bad.md"), self.path("docs/bad.html")),
+                                     (self.path("content/index.md"), self.path("docs/index.html"))],
+                                    self.path("template.html"), '/', jobs=2)
+        self.assertListEqual(failed, [self.path("content/bad.md")])
+        self.assertIn("UnbalancedDelimiters", out.getvalue())
+        self.assertTrue(os.path.exists(self.path("docs/index.html")))
+
+    def test_large_sources_are_mapped(self):
+        self.write("content/big.md", "intro\n\n# Big Page\n\n" + "some **bold** text\n\n- a\n- b\n\n" * 50)
+        with redirect_stdout(io.StringIO()):
+            generate_pages([(self.path("content/big.md"), self.path("docs/read.html"))],
+                           self.path("template.html"), '/')
+            threshold, build.MMAP_THRESHOLD = build.MMAP_THRESHOLD, 100
+            try:
+                failed = generate_pages([(self.path("content/big.md"), self.path("docs/mapped.html")),
+                                         (self.path("content/index.md"), self.path("docs/index.html"))],
+                                        self.path("template.html"), '/')
+            finally:
+                build.MMAP_THRESHOLD = threshold
+        self.assertListEqual(failed, [])
+        self.assertIn("<title>Big Page</title>", self.read("docs/mapped.html"))
+        self.assertEqual(self.read("docs/mapped.html"), self.read("docs/read.html"))
+
+    def test_big_pages_are_streamed(self):
+        self.write("content/big.md", "# Big Page\n\n" + "some **bold** text\n\n- a\n- b\n\n" * 50)
+        pages = [(self.path("content/big.md"), self.path("docs/big.html")),
+                 (self.path("content/index.md"), self.path("docs/index.html"))]
+        with redirect_stdout(io.StringIO()):
+            generate_pages(pages, self.path("template.html"), '/')
+            buffered = self.read("docs/big.html"), self.read("docs/index.html")
+            threshold, build.BUFFER_THRESHOLD = build.BUFFER_THRESHOLD, 100
+            try:
+                failed = generate_pages(pages, self.path("template.html"), '/')
+            finally:
+                build.BUFFER_THRESHOLD = threshold
+        self.assertListEqual(failed, [])
+        self.assertEqual((self.read("docs/big.html"), self.read("docs/index.html")), buffered)
+        self.assertListEqual(sorted(os.listdir(self.path("docs"))), ["big.html", "index.html"])
+
+    def test_crlf_sources(self):
+        self.write("content/crlf.md", "# Title\r\n\r\nsome **bold**\r\ntext\r\n\r\n\r\n- a\r\n- b\r\n")
+        expected = ('<html><title>Title</title><link href="/index.css"><body><div><h1>Title</h1>'
+                    '<p>some <b>bold</b>\ntext</p><ul><li>a</li>\n<li>b</li></ul></div></body></html>')
+        with redirect_stdout(io.StringIO()):
+            failed = generate_pages([(self.path("content/crlf.md"), self.path("docs/read.html"))],
+                                    self.path("template.html"), '/')
+            threshold, build.MMAP_THRESHOLD = build.MMAP_THRESHOLD, 10
+            try:
+                failed += generate_pages([(self.path("content/crlf.md"), self.path("docs/mapped.html"))],
+                                         self.path("template.html"), '/')
+            finally:
+                build.MMAP_THRESHOLD = threshold
+        self.assertListEqual(failed, [])
+        self.assertEqual(self.read("docs/read.html"), expected)
+        self.assertEqual(self.read("docs/mapped.html"), expected)
+
+    def test_extract_title(self):
+        for md in ("# Top\nbody", "intro\n# Later\nbody", "intro\n# Last"):
+            self.assertEqual(extract_title_bytes(md.encode('utf-8')), extract_title(md))
+        self.assertEqual(extract_title("intro\n# Later\nbody"), "Later")
+        with self.assertRaises(Exception):
+            extract_title_bytes(b"no title")
+
+
+if __name__ == "__main__":
+    unittest.main()
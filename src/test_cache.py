@@ -0,0 +1,76 @@
+import time
+import unittest
+
+from cache import BlockCache
+from conversion import md_to_html, md_to_html_iter
+from tempdir import TempDirTestCase
+
+MD = "# Title\n\nSome **bold** text with a [link](/a)\n\n- one\n- two"
+
+
+class TestBlockCache(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cache_path = self.path("cache", "blocks.sqlite3")
+
+    def test_cached_render_matches_uncached(self):
+        cache = BlockCache(self.cache_path)
+        expected = md_to_html(MD, '/site/').to_html()
+        self.assertEqual(md_to_html(MD, '/site/', cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (0, 3))
+        self.assertEqual(md_to_html(MD, '/site/', cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+        cache.close()
+
+    def test_streaming_uses_the_cache(self):
+        cache = BlockCache(self.cache_path)
+        expected = md_to_html(MD).to_html()
+        self.assertEqual(''.join(md_to_html_iter(MD, '/', cache)), expected)
+        self.assertEqual(''.join(md_to_html_iter(MD, '/', cache)), expected)
+        self.assertEqual((cache.hits, cache.misses), (3, 3))
+        cache.close()
+
+    def test_cached_block_info(self):
+        from siteindex import PageInfo
+        expected, cold, warm = PageInfo(), PageInfo(), PageInfo()
+        ''.join(md_to_html_iter(MD, '/', None, expected))
+        cache = BlockCache(self.cache_path)
+        ''.join(md_to_html_iter(MD, '/', cache, cold))
+        ''.join(md_to_html_iter(MD, '/', cache, warm))
+        self.assertEqual(cache.hits, 3)
+        for info in (cold, warm):
+            self.assertEqual(info.record("a.md", "a.html"), expected.record("a.md", "a.html"))
+        self.assertListEqual(expected.links, [["/a", 3]])
+        cache.close()
+
+    def test_persists_between_builds(self):
+        cache = BlockCache(self.cache_path)
+        md_to_html(MD, '/', cache)
+        cache.close()
+        cache = BlockCache(self.cache_path)
+        md_to_html(MD + "\n\nA new paragraph", '/', cache)
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+        cache.close()
+
+    def test_basepath_is_part_of_the_key(self):
+        cache = BlockCache(self.cache_path)
+        md_to_html("[link](/a)", '/', cache)
+        html = md_to_html("[link](/a)", '/site/', cache).to_html()
+        self.assertEqual(cache.misses, 2)
+        self.assertIn('href="/site/a"', html)
+        cache.close()
+
+    def test_evicts_least_recently_used(self):
+        cache = BlockCache(self.cache_path, max_bytes=0)
+        cache.put_many({"old": "x" * 10})
+        time.sleep(0.01)
+        cache.put_many({"new": "y" * 10})
+        cache.max_bytes = 15
+        self.assertEqual(cache.evict(), 1)
+        self.assertDictEqual(cache.get_many(["old", "new"]), {"new": "y" * 10})
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
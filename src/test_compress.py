@@ -0,0 +1,60 @@
+import gzip
+import os
+import unittest
+
+from compress import compress_outputs, remove_compressed
+from tempdir import TempDirTestCase
+
+TEXT = "<p>" + "some words that repeat " * 200 + "</p>"
+
+
+class TestCompress(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.docs = self.root
+        self.write("index.html", TEXT)
+        self.write("blog/post.html", TEXT)
+        self.write("small.css", "body {}")
+        self.write("images/a.png", TEXT)
+
+    def compress(self):
+        return compress_outputs(self.docs, ["index.html", "blog/post.html", "small.css", "images/a.png"], 2)
+
+    def test_compresses_text_outputs(self):
+        compressed, current, size, packed = self.compress()
+        self.assertEqual((compressed, current), (2, 1))
+        self.assertLess(packed, size)
+        with gzip.open(self.path("index.html.gz"), 'rt', encoding='utf-8') as f:
+            self.assertEqual(f.read(), TEXT)
+        # Too small to benefit, or not a text format
+        self.assertFalse(os.path.exists(self.path("small.css.gz")))
+        self.assertFalse(os.path.exists(self.path("images/a.png.gz")))
+
+    def test_up_to_date_outputs_are_skipped(self):
+        self.compress()
+        with open(self.path("index.html.gz"), 'rb') as f:
+            first = f.read()
+        self.assertEqual(self.compress()[0], 0)
+
+        self.write("index.html", TEXT + "<p>more</p>")
+        os.utime(self.path("index.html"), ns=(0, 10**18))
+        self.assertEqual(self.compress()[0], 1)
+        with open(self.path("index.html.gz"), 'rb') as f:
+            self.assertNotEqual(f.read(), first)
+
+    def test_shrunk_files_lose_their_compressed_copy(self):
+        self.compress()
+        self.write("index.html", "tiny")
+        self.compress()
+        self.assertFalse(os.path.exists(self.path("index.html.gz")))
+
+    def test_remove_compressed(self):
+        self.compress()
+        remove_compressed(self.docs, ["index.html", "small.css"])
+        self.assertFalse(os.path.exists(self.path("index.html.gz")))
+        self.assertTrue(os.path.exists(self.path("blog/post.html.gz")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+import unittest
+
+from fileio import read_bytes, write_bytes, replacing, run_pipeline
+from tempdir import TempDirTestCase
+
+
+class TestPipeline(TempDirTestCase):
+
+    def test_results_keep_item_order(self):
+        def read(item):
+            time.sleep(0.001 * (5 - item))
+            return item * 10
+
+        results = run_pipeline(list(range(5)), read, lambda item, data: data + 1,
+                               lambda item, data: (item, data), io_threads=4, in_flight=4)
+        self.assertListEqual(results, [(i, (i, i * 10 + 1)) for i in range(5)])
+
+    def test_items_can_be_a_generator(self):
+        pulled = []
+
+        def items():
+            for i in range(10):
+                pulled.append(i)
+                yield i
+
+        def read(item):
+            # Only the items holding a slot have been taken from the generator
+            self.assertLessEqual(len(pulled), item + 2)
+            return item
+
+        results = run_pipeline(items(), read, lambda item, data: data, lambda item, data: data,
+                               io_threads=1, in_flight=2)
+        self.assertListEqual([item for item, _ in results], list(range(10)))
+
+    def test_results_can_be_streamed(self):
+        seen = []
+        for items in ([7], list(range(6))):
+            seen.clear()
+            returned = run_pipeline(items, lambda item: item, lambda item, data: data * 2,
+                                    lambda item, data: data, io_threads=2, in_flight=2,
+                                    on_result=lambda item, result: seen.append((item, result)))
+            self.assertIsNone(returned)
+            self.assertListEqual(sorted(seen), [(i, i * 2) for i in items])
+
+    def test_in_flight_is_bounded(self):
+        lock = threading.Lock()
+        active = [0, 0]  # current, most seen
+
+        def read(item):
+            with lock:
+                active[0] += 1
+                active[1] = max(active)
+            time.sleep(0.005)
+            return item
+
+        def write(item, data):
+            with lock:
+                active[0] -= 1
+            return data
+
+        run_pipeline(list(range(20)), read, lambda item, data: data, write, io_threads=8, in_flight=3)
+        self.assertLessEqual(active[1], 3)
+        self.assertGreater(active[1], 1)
+
+    def test_errors_are_returned_per_item(self):
+        def process(item, data):
+            if item == 1:
+                raise ValueError("bad item")
+            return data
+
+        results = run_pipeline([0, 1, 2], lambda item: item, process, lambda item, data: data)
+        self.assertEqual(results[0], (0, 0))
+        self.assertIsInstance(results[1][1], ValueError)
+        self.assertEqual(results[2], (2, 2))
+
+    def test_write_bytes_replaces_atomically(self):
+        path = self.path("a", "b.html")
+        write_bytes(path, b"one")
+        write_bytes(path, b"two")
+        self.assertEqual(read_bytes(path), b"two")
+        self.assertListEqual(os.listdir(os.path.dirname(path)), ["b.html"])
+
+    def test_failed_replace_keeps_the_old_file(self):
+        path = self.path("b.html")
+        write_bytes(path, b"one")
+        with self.assertRaises(RuntimeError):
+            with replacing(path) as tmp_path:
+                with open(tmp_path, 'wb') as f:
+                    f.write(b"half")
+                raise RuntimeError
+        self.assertEqual(read_bytes(path), b"one")
+        self.assertListEqual(os.listdir(self.root), ["b.html"])
+
+if __name__ == "__main__":
+    unittest.main()
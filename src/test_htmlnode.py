@@ -1,9 +1,12 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
 from textnode import TextNode, TextType 
 from parsing import p_text_node_to_html_node
-from conversion import md_to_html
+from concurrent.futures import ThreadPoolExecutor
+from conversion import md_to_html, md_to_html_iter, render, render_many
+from parsing import UnbalancedDelimiters
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -73,6 +76,18 @@ class TestHTMLNode(unittest.TestCase):
             "<div><span><b>grandchild</b></span></div>",
         )
 
+    def test_iter_html_chunks(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode("b", "bold"), LeafNode(None, " text")])])
+        chunks = list(node.iter_html())
+        self.assertListEqual(chunks, ["<div>", "<p>", "<b>bold</b>", " text", "</p>", "</div>"])
+        self.assertEqual(''.join(chunks), node.to_html())
+
+    def test_write_html(self):
+        node = md_to_html("# Title\n\n```\ncode\n```")
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), "<div><h1>Title</h1><pre><code>\ncode\n</code></pre></div>")
+
     def test_parent_empty_children(self):
         try:
             node = ParentNode('p', [])
@@ -133,6 +148,17 @@ This is another paragraph with _italic_ text and `code` here
             repr(html),
             repr("<div><p>This is <b>bolded</b> paragraph\ntext in a p\ntag here</p><p>This is another paragraph with <i>italic</i> text and <code>code</code> here</p></div>"),
         )
+    def test_render_is_repeatable(self):
+        md = "## Heading\n\n> quote with **bold** text\n>\n> more\n\n- item _one_ (see)\n- two\n\n1. first\n2. second"
+        node = md_to_html(md)
+        html = node.to_html()
+        self.assertEqual(html, node.to_html())
+        self.assertEqual(
+            html,
+            "<div><h2>Heading</h2><blockquote>quote with <b>bold</b> text\n\n more</blockquote>"
+            "<ul><li>item <i>one</i> (see)</li>\n<li>two</li></ul><ol><li>first</li>\n<li>second</li></ol></div>",
+        )
+
     def test_codeblock(self):
         md = """
 ```c
@@ -148,6 +174,42 @@ the **same** even with inline stuff
             repr("<div><pre><code>c\nThis is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>"),
         )
 
+    def test_streaming_matches_tree(self):
+        md = "# Title\n\n\n\n> a **quote**\n\n- one\n- [two](/two)\n\n```\ncode\n```\n\n1. x\n2. _y_\n"
+        self.assertEqual(''.join(md_to_html_iter(md, '/site/')), md_to_html(md, '/site/').to_html())
+
+    def test_streaming_is_lazy(self):
+        chunks = md_to_html_iter("# Title\n\nsome **unbalanced")
+        self.assertEqual(next(chunks), "<div>")
+        self.assertEqual(next(chunks), "<h1>")
+        with self.assertRaises(UnbalancedDelimiters):
+            list(chunks)
+
+    def test_streaming_empty_document(self):
+        with self.assertRaises(ValueError):
+            list(md_to_html_iter("\n\n  \n"))
+
+    def test_empty_blocks(self):
+        md = "# Title\n\n>\n\n# #\n\npara"
+        expected = '<div><h1>Title</h1><blockquote></blockquote><h1></h1><p>para</p></div>'
+        self.assertEqual(md_to_html(md).to_html(), expected)
+        self.assertEqual(''.join(md_to_html_iter(md)), expected)
+        self.assertEqual(render(md), expected)
+
+    def test_render_matches_tree(self):
+        docs = ["# Title\n\n> a **quote**\n\n- one\n- [two](/two)\n\n```\ncode  here\n```",
+                "1. x\n2. _y_\n\n![pic](/p.png)", "# Title\n\nagain"]
+        expected = [md_to_html(md, '/site/').to_html() for md in docs]
+        self.assertListEqual(list(render_many(docs, '/site/')), expected)
+        self.assertEqual(render(docs[0], '/site/'), expected[0])
+        self.assertEqual(render(docs[0], '/'), md_to_html(docs[0], '/').to_html())
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            self.assertListEqual(list(pool.map(render, docs * 50, ['/site/'] * 150)), expected * 50)
+        with self.assertRaises(ValueError):
+            render("\n\n")
+        with self.assertRaises(TypeError):
+            render(b"# bytes")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from linkcheck import resolve, find_broken
+
+
+def record(output, links=(), images=()):
+    return {"output": output, "links": [list(link) for link in links],
+            "images": [list(image) for image in images]}
+
+
+class TestLinkCheck(unittest.TestCase):
+
+    def test_resolve(self):
+        self.assertEqual(resolve("/blog/post", "index.html"), "blog/post")
+        self.assertEqual(resolve("/", "blog/post/index.html"), "")
+        self.assertEqual(resolve("../other/", "blog/post/index.html"), "blog/other")
+        self.assertEqual(resolve("pic%20one.png?size=2#top", "blog/index.html"), "blog/pic one.png")
+        for url in ("https://example.com/", "//cdn.example.com/x.js", "mailto:me@example.com", "#section"):
+            self.assertIsNone(resolve(url, "index.html"))
+
+    def test_find_broken(self):
+        index = {
+            "index.md": record("index.html", links=[("/blog/post", 3), ("/missing", 5), ("https://x.org", 6)],
+                               images=[("/images/a.png", 4), ("/images/gone.png", 8)]),
+            "blog/post/index.md": record("blog/post/index.html", links=[("/", 1), ("../post/#top", 2)]),
+            "about.md": record("about.html", links=[("/about", 1)]),
+        }
+        self.assertListEqual(find_broken(index, {"images/a.png": {}}),
+                             [("index.md", 5, "/missing"), ("index.md", 8, "/images/gone.png")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import io
+import os
+import subprocess
+import sys
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+from main import main
+from tempdir import TempDirTestCase
+
+TEMPLATE = '<html><title>{{ Title }}</title><body>{{ Content }}</body></html>'
+
+
+class TestCommandLine(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write("site/template.html", TEMPLATE)
+        self.write("site/pages/index.md", "# Home\n\nSee [post](/post)")
+
+    def run_main(self, *argv):
+        paths = ["--content", self.path("site/pages"), "--output", self.path("out")]
+        if argv[0] != "check":
+            paths += ["--static", self.path("site/assets")]
+        with redirect_stdout(io.StringIO()) as out:
+            code = main(list(argv) + paths)
+        return code, out.getvalue()
+
+    def test_build_and_check(self):
+        code, _ = self.run_main("build", "--template", self.path("site/template.html"), "--no-cache")
+        self.assertEqual(code, 0)
+        with open(self.path("out/index.html"), 'r', encoding='utf-8') as f:
+            self.assertIn("<h1>Home</h1>", f.read())
+        self.assertTrue(os.path.isdir(self.path("site/assets")))
+
+        code, out = self.run_main("check")
+        self.assertEqual(code, 1)
+        self.assertIn('broken link "/post"', out)
+        # check only reads the content and the output
+        with redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            main(["check", "--template", self.path("site/template.html")])
+
+    def test_build_is_the_default_command(self):
+        code, out = self.run_main("/site/", "--template", self.path("site/template.html"), "--no-cache")
+        self.assertEqual(code, 0)
+        self.assertIn("Generating page", out)
+
+    def test_import_is_light(self):
+        # Neither importing the CLI nor checking links loads the build engine
+        script = ("import sys, main; main.main(['check', '--output', 'nowhere']);"
+                  "print(sorted(m for m in ('build', 'conversion', 'asyncio', 'sqlite3') if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(result.stdout.splitlines()[-1], "[]")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import unittest
+
+from manifest import *
+from tempdir import TempDirTestCase
+
+
+class TestManifest(TempDirTestCase):
+
+    def test_manifest_path(self):
+        self.assertEqual(manifest_path("docs"), "docs.manifest.json")
+        self.assertEqual(manifest_path("docs/"), "docs.manifest.json")
+
+    def test_load_missing_or_corrupt(self):
+        self.assertIsNone(load_manifest(os.path.join(self.root, "nope.json")))
+        path = self.write("bad.json", "{not json")
+        self.assertIsNone(load_manifest(path))
+        path = self.write("old.json", '{"version": 0}')
+        self.assertIsNone(load_manifest(path))
+
+    def test_save_load_roundtrip(self):
+        path = os.path.join(self.root, "docs.manifest.json")
+        manifest = {"version": MANIFEST_VERSION, "basepath": "/", "pages": {}}
+        save_manifest(path, manifest)
+        self.assertEqual(load_manifest(path), manifest)
+
+    def test_file_entry_reuses_hash_when_stat_matches(self):
+        path = self.write("a.md", "# A")
+        entry = file_entry(path)
+        stale = dict(entry, hash="cached")
+        self.assertEqual(file_entry(path, stale)["hash"], "cached")
+
+        self.write("a.md", "# Changed")
+        self.assertNotEqual(file_entry(path, stale)["hash"], "cached")
+
+    def test_scan_files_suffix(self):
+        self.write("index.md", "# Home")
+        self.write("blog/post/index.md", "# Post")
+        self.write("blog/post/notes.txt", "skip")
+        self.assertListEqual(sorted(scan_files(self.root, suffix=".md")),
+                             ["blog/post/index.md", "index.md"])
+
+    def test_diff_entries(self):
+        old = {"a.md": {"hash": "1"}, "b.md": {"hash": "2"}, "c.md": {"hash": "3"}}
+        new = {"a.md": {"hash": "1"}, "b.md": {"hash": "x"}, "d.md": {"hash": "4"}}
+        changed, removed = diff_entries(old, new)
+        self.assertListEqual(changed, ["b.md", "d.md"])
+        self.assertListEqual(removed, ["c.md"])
+
+    def test_needs_full_rebuild(self):
+        old = {"basepath": "/", "template": {"hash": "t"}}
+        self.assertTrue(needs_full_rebuild(None, old))
+        self.assertFalse(needs_full_rebuild(old, dict(old)))
+        self.assertTrue(needs_full_rebuild(old, dict(old, basepath="/site/")))
+        self.assertTrue(needs_full_rebuild(old, dict(old, template={"hash": "u"})))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from minify import minify_html, Minifier
+from conversion import md_to_html_iter
+from cache import BlockCache
+from template import Template
+from tempdir import TempDirTestCase
+
+MD = "# Title\n\nsome\ntext  here\n\n- one\n- two\n\n```\ncode  keeps\n   its spaces\n```\n\nsee `a  b` and **bold** _it_"
+
+
+class TestMinify(TempDirTestCase):
+
+    def test_minify_html(self):
+        self.assertEqual(minify_html('<ul>\n  <li>a</li>\n  <li>b</li>\n</ul>\n'), '<ul><li>a</li><li>b</li></ul>')
+        self.assertEqual(minify_html('<p>\n  one\n  two </p>'), '<p>one two</p>')
+        # Whitespace between inline elements still renders as one space
+        self.assertEqual(minify_html('<b>a</b>\n\n  <i>b</i>'), '<b>a</b> <i>b</i>')
+        self.assertEqual(minify_html('<pre>  a\n\n  b</pre>\n<p> c </p>'), '<pre>  a\n\n  b</pre><p>c</p>')
+        self.assertEqual(minify_html('<script>\n  var a;\n</script>'), '<script>\n  var a;\n</script>')
+        # Non-breaking and other Unicode spaces render, so they stay
+        self.assertEqual(minify_html('<p>\u00a0a\u3000 \u00a0b\u00a0</p>'), '<p>\u00a0a\u3000 \u00a0b\u00a0</p>')
+
+    def test_minifier_counts_saved_bytes(self):
+        minifier = Minifier()
+        minifier('<p>\n  a  </p>')
+        minifier('b\n\n c')
+        self.assertEqual(minifier.saved, 7)
+        minifier('<p> \u00e9  \u00e9 </p>')
+        self.assertEqual(minifier.saved, 10)
+
+    def test_code_is_left_alone(self):
+        html = ''.join(md_to_html_iter(MD, '/', None, None, True))
+        self.assertEqual(
+            html,
+            '<div><h1>Title</h1><p>some text here</p><ul><li>one</li><li>two</li></ul>'
+            '<pre><code>\ncode  keeps\n   its spaces\n</code></pre>'
+            '<p>see <code>a  b</code> and <b>bold</b> <i>it</i></p></div>',
+        )
+
+    def test_cached_blocks_are_minified_apart(self):
+        cache = BlockCache(self.path("blocks.sqlite3"))
+        plain = ''.join(md_to_html_iter(MD, '/'))
+        # A Minifier passed as minify counts what it saved, cached blocks included
+        expected, cold, warm = Minifier(), Minifier(), Minifier()
+        minified = ''.join(md_to_html_iter(MD, '/', None, None, expected))
+        self.assertEqual(''.join(md_to_html_iter(MD, '/', cache)), plain)
+        self.assertEqual(''.join(md_to_html_iter(MD, '/', cache, None, cold)), minified)
+        self.assertEqual(''.join(md_to_html_iter(MD, '/', cache, None, warm)), minified)
+        self.assertEqual(len(plain) - len(minified), expected.saved)
+        self.assertEqual((cold.saved, warm.saved), (expected.saved, expected.saved))
+        cache.close()
+
+    def test_template(self):
+        template = Template('<html>\n  <title>{{ Title }}</title>\n  <body>\n    {{ Content }}\n  </body>\n</html>\n',
+                            '/', True)
+        self.assertEqual(template.render_string({"Title": "T", "Content": "<p>c</p>"}),
+                         '<html><title>T</title><body><p>c</p></body></html>')
+        self.assertEqual(template.saved, 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import time
+import unittest
+
+from profiling import Profiler, NO_STAGE
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_disabled_costs_nothing(self):
+        profiler = Profiler()
+        self.assertIs(profiler.stage("parse"), NO_STAGE)
+        with profiler.stage("parse"):
+            pass
+        chunks = ["a", "b"]
+        self.assertIs(profiler.iter_stage("serialize", chunks), chunks)
+        self.assertEqual(profiler.stages, {})
+
+    def test_nested_stages_are_exclusive(self):
+        profiler = Profiler()
+        profiler.enabled = True
+        with profiler.stage("outer"):
+            time.sleep(0.02)
+            with profiler.stage("inner"):
+                time.sleep(0.02)
+        outer, inner = profiler.stages["outer"], profiler.stages["inner"]
+        self.assertEqual((outer[1], inner[1]), (1, 1))
+        self.assertLess(outer[0], 0.035)
+        self.assertGreaterEqual(inner[0], 0.02)
+
+    def test_iter_stage_counts_chunks(self):
+        profiler = Profiler()
+        profiler.enabled = True
+        self.assertEqual(list(profiler.iter_stage("serialize", ["<p>", "", "</p>"])), ["<p>", "", "</p>"])
+        self.assertEqual(profiler.stages["serialize"][1], 4)
+
+    def test_take_and_merge(self):
+        worker, parent = Profiler(), Profiler()
+        worker.enabled = parent.enabled = True
+        with worker.stage("read"):
+            pass
+        worker.page("a.md", 0.5, 10, 20)
+        with parent.stage("read"):
+            pass
+        parent.merge(worker.take())
+        self.assertEqual(worker.stages, {})
+        self.assertEqual(parent.stages["read"][1], 2)
+        self.assertEqual(parent.pages, [[0.5, 10, 20, "a.md"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from build import render_content
+from server import SiteWatcher
+from tempdir import TempDirTestCase
+
+
+class TestSiteWatcher(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write("static/index.css", "body {}")
+        self.write("content/index.md", "# Home\n\nhello")
+        self.watcher = SiteWatcher(self.path("content"), self.path("static"),
+                                   self.path("template.html"), self.path("docs"), '/')
+        with redirect_stdout(io.StringIO()):
+            self.watcher.start()
+
+    def write(self, path, text):
+        full_path = super().write(path, text)
+        # Make sure the poller sees a new mtime even on coarse filesystems
+        st = os.stat(full_path)
+        os.utime(full_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        return full_path
+
+    def poll(self):
+        with redirect_stdout(io.StringIO()) as out:
+            count = self.watcher.poll()
+        return count, out.getvalue()
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.poll()[0], 0)
+
+    def test_page_change_rerenders_only_that_page(self):
+        self.write("content/other.md", "# Other")
+        self.write("content/index.md", "# Home\n\nedited")
+        count, out = self.poll()
+        self.assertEqual(count, 2)
+        self.assertIn("edited", self.read("docs/index.html"))
+        self.assertEqual(self.read("docs/other.html"), "<title>Other</title><div><h1>Other</h1></div>")
+
+    def test_template_change_reuses_cached_pages(self):
+        self.write("content/index.md", "# Home\n\ncached")
+        self.poll()
+        self.write("template.html", "<h6>{{ Title }}</h6>{{ Content }}")
+        _, out = self.poll()
+        self.assertNotIn("Generating page", out)
+        self.assertTrue(self.read("docs/index.html").startswith("<h6>Home</h6>"))
+
+    def test_first_template_change_uses_pages_from_start(self):
+        self.write("template.html", "<h6>{{ Title }}</h6>{{ Content }}")
+        _, out = self.poll()
+        self.assertNotIn("Generating page", out)
+        self.assertEqual(self.read("docs/index.html"), "<h6>Home</h6><div><h1>Home</h1><p>hello</p></div>")
+        self.assertFalse(os.path.exists(self.path("docs/index.html.tmp")))
+
+    def test_start_renders_each_page_once(self):
+        renders = []
+        def counting(md_file, basepath):
+            renders.append(md_file)
+            return render_content(md_file, basepath)
+        self.write("content/other.md", "# Other")
+        with redirect_stdout(io.StringIO()), patch("server.render_content", counting):
+            # The build renders other.md and index.md is up to date, so only
+            # index.md is parsed to fill the cache
+            watcher = SiteWatcher(self.path("content"), self.path("static"),
+                                  self.path("template.html"), self.path("docs"), '/')
+            watcher.start()
+            self.assertListEqual(renders, ["# Home\n\nhello"])
+            self.assertListEqual(sorted(watcher.pages), ["index.md", "other.md"])
+            self.assertEqual(watcher.pages["other.md"], ("Other", "<div><h1>Other</h1></div>"))
+            # Without watching, nothing is cached
+            watcher = SiteWatcher(self.path("content"), self.path("static"),
+                                  self.path("template.html"), self.path("docs2"), '/')
+            watcher.start(watch=False)
+            self.assertDictEqual(watcher.pages, {})
+        self.assertEqual(len(renders), 1)
+
+    def test_removed_files(self):
+        os.remove(self.path("static/index.css"))
+        os.remove(self.path("content/index.md"))
+        self.poll()
+        self.assertFalse(os.path.exists(self.path("docs/index.css")))
+        self.assertFalse(os.path.exists(self.path("docs/index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
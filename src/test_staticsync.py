@@ -0,0 +1,60 @@
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+
+from manifest import scan_files
+from staticsync import sync_static, sync_file, prune_output
+from tempdir import TempDirTestCase
+
+
+class TestStaticSync(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.static = self.path("static")
+        self.docs = self.path("docs")
+        self.write("static/index.css", "body {}")
+        self.write("static/images/a.png", "png bytes")
+
+    def sync(self, mode="auto", compare="mtime"):
+        with redirect_stdout(io.StringIO()):
+            return sync_static(self.static, self.docs, scan_files(self.static), mode, compare)
+
+    def test_unchanged_files_are_skipped(self):
+        counts = self.sync()
+        self.assertEqual(sum(counts.values()), 2)
+        self.assertNotIn("unchanged", counts)
+        self.assertEqual(self.sync(), {"unchanged": 2})
+
+        self.write("static/index.css", "body { margin: 0 }")
+        counts = self.sync(compare="hash")
+        self.assertEqual(counts["unchanged"], 1)
+        with open(os.path.join(self.docs, "index.css"), encoding='utf-8') as f:
+            self.assertEqual(f.read(), "body { margin: 0 }")
+
+    def test_copy_keeps_mtime(self):
+        self.sync(mode="copy")
+        src, dest = os.stat(os.path.join(self.static, "index.css")), os.stat(os.path.join(self.docs, "index.css"))
+        self.assertEqual(src.st_mtime_ns, dest.st_mtime_ns)
+        self.assertNotEqual(src.st_ino, dest.st_ino)
+
+    def test_hardlink_shares_the_file(self):
+        src, dest = os.path.join(self.static, "index.css"), os.path.join(self.docs, "index.css")
+        method = sync_file(src, dest, "hardlink")
+        if method == "hardlink":
+            self.assertTrue(os.path.samefile(src, dest))
+        with open(dest, encoding='utf-8') as f:
+            self.assertEqual(f.read(), "body {}")
+
+    def test_prune_removes_orphans(self):
+        self.sync()
+        self.write("docs/old/gone.png", "stale")
+        removed = prune_output(self.docs, {"index.css", "images/a.png"})
+        self.assertListEqual(removed, [os.path.join(self.docs, "old", "gone.png")])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "old")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "images", "a.png")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import io
+import unittest
+
+from template import Template
+
+
+class TestTemplate(unittest.TestCase):
+
+    def test_segments_and_slots(self):
+        template = Template('<title>{{ Title }}</title><main>{{ Content }}</main>')
+        self.assertListEqual(template.slots(), ["Title", "Content"])
+        self.assertEqual(
+            template.render_string({"Title": "Hi", "Content": "<p>body</p>"}),
+            "<title>Hi</title><main><p>body</p></main>",
+        )
+
+    def test_basepath_applied_at_compile_time(self):
+        template = Template('<link href="/index.css"><img src="/a.png">{{ Content }}', '/site/')
+        self.assertEqual(
+            template.render_string({"Content": '<a href="/not/rewritten">'}),
+            '<link href="/site/index.css"><img src="/site/a.png"><a href="/not/rewritten">',
+        )
+
+    def test_more_placeholders(self):
+        template = Template('{{ Date }} {{Path}} {{ Nav }} {{ Unknown }}')
+        self.assertEqual(
+            template.render_string({"Date": "2024-01-01", "Path": "/blog/", "Nav": "<nav></nav>"}),
+            "2024-01-01 /blog/ <nav></nav> {{ Unknown }}",
+        )
+
+    def test_streamed_values(self):
+        template = Template('[{{ Content }}|{{ Content }}]')
+        out = io.StringIO()
+        template.render(out, {"Content": lambda: iter(["a", "b"])})
+        self.assertEqual(out.getvalue(), "[ab|ab]")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -168,6 +168,19 @@ class TestTextNode(unittest.TestCase):
             new_nodes,
         )
 
+    def test_split_links_regex_characters(self):
+        node = TextNode("See [C++ (draft)](/c++) and [a|b](/x?y=1) too", TextType.PLAIN_TEXT)
+        self.assertListEqual(
+            [
+                TextNode("See ", TextType.PLAIN_TEXT),
+                TextNode("C++ (draft)", TextType.LINK_ANCHOR_TEXT_URL, "/c++"),
+                TextNode(" and ", TextType.PLAIN_TEXT),
+                TextNode("a|b", TextType.LINK_ANCHOR_TEXT_URL, "/x?y=1"),
+                TextNode(" too", TextType.PLAIN_TEXT),
+            ],
+            p_split_link_nodes([node]),
+        )
+
     def test_text_to_nodes(self):
         raw_text = 'This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)'
         nodes = p_text_to_text_nodes(raw_text)
@@ -221,6 +234,48 @@ class TestTextNode(unittest.TestCase):
             nodes
         )
 
+    def test_text_to_nodes_nested(self):
+        nodes = p_text_to_text_nodes('**bold _italic_ and `code`** [link](/a)')
+        self.assertListEqual(
+            [
+                TextNode("bold ", TextType.BOLD_TEXT),
+                TextNode("italic", TextType.ITALIC_TEXT),
+                TextNode(" and ", TextType.BOLD_TEXT),
+                TextNode("code", TextType.CODE_TEXT),
+                TextNode(" ", TextType.PLAIN_TEXT),
+                TextNode("link", TextType.LINK_ANCHOR_TEXT_URL, "/a"),
+            ],
+            nodes
+        )
+
+    def test_text_to_nodes_no_links_in_bold(self):
+        nodes = p_text_to_text_nodes('**[link](/a)** ![img](/b)')
+        self.assertListEqual(
+            [
+                TextNode("[link](/a)", TextType.BOLD_TEXT),
+                TextNode(" ", TextType.PLAIN_TEXT),
+                TextNode("img", TextType.IMAGE_ALT_TEXT_URL, "/b"),
+            ],
+            nodes
+        )
+
+    def test_text_to_nodes_keeps_text_after_empty_span(self):
+        nodes = p_text_to_text_nodes('_y_**z** ``')
+        self.assertListEqual(
+            [
+                TextNode("y", TextType.ITALIC_TEXT),
+                TextNode("z", TextType.BOLD_TEXT),
+                TextNode(" ", TextType.PLAIN_TEXT),
+                TextNode("", TextType.CODE_TEXT),
+            ],
+            nodes
+        )
+
+    def test_text_to_nodes_unbalanced(self):
+        for text in ('Text **', '_half italic', 'a `b` `c'):
+            with self.assertRaises(UnbalancedDelimiters):
+                p_text_to_text_nodes(text)
+
     def test_markdown_to_blocks(self):
         md = """
 This is **bolded** paragraph
@@ -268,6 +323,23 @@ This is the same paragraph on a new line
             ],
     )
 
+    def test_iter_blocks_matches_markdown_to_blocks(self):
+        md = "\n  # Títle \n\n\n\npara\u00a0\nline two\n\n \n\n- a\n- b\n\n```\ncode\n```\n\n\u00a0"
+        self.assertListEqual(list(p_iter_blocks(md.encode('utf-8'))), p_markdown_to_blocks(md))
+        spans = list(p_iter_block_spans(b"one\n\ntwo"))
+        self.assertListEqual(spans, [(0, 3), (5, 8)])
+
+    def test_block_parsing_long_blocks(self):
+        ordered = '\n'.join(f'{i + 1}. item' for i in range(10000))
+        self.assertEqual(p_block_to_blocktype(ordered), BlockType.ORDERED_LIST)
+        self.assertEqual(p_block_to_blocktype(ordered.replace("5000. ", "5001. ")), BlockType.PARAGRAPH)
+        quote = '\n'.join('> line' for _ in range(10000))
+        self.assertEqual(p_block_to_blocktype(quote), BlockType.QUOTE)
+        self.assertEqual(p_block_to_blocktype(quote + '\nnot quoted'), BlockType.PARAGRAPH)
+        self.assertEqual(p_block_to_blocktype("####### seven"), BlockType.PARAGRAPH)
+        self.assertEqual(p_block_to_blocktype("``````"), BlockType.CODE)
+        self.assertEqual(p_block_to_blocktype("`````"), BlockType.PARAGRAPH)
+
     def test_block_parsing_isolated(self):
         blocks = [
             "# Header",
@@ -0,0 +1,60 @@
+import os
+import unittest
+
+from tempdir import TempDirTestCase
+from walk import PathFilter, walk_files
+
+
+class TestWalk(TempDirTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for path in ("index.md", "blog/b.md", "blog/a.md", "blog/notes.txt", "blog/drafts/wip.md",
+                     ".git/config", "blog/.post.md.swp", "about/_hidden.md"):
+            self.write(path, "")
+
+    def walk(self, path_filter=PathFilter(), suffix=''):
+        return [path for path, _ in walk_files(self.root, path_filter, suffix)]
+
+    def test_sorted_and_skips_dotfiles(self):
+        self.assertListEqual(self.walk(), ["index.md", "about/_hidden.md", "blog/a.md", "blog/b.md",
+                                           "blog/notes.txt", "blog/drafts/wip.md"])
+        self.assertIn(".git/config", self.walk(PathFilter(hidden=True)))
+
+    def test_suffix_and_entries(self):
+        entries = dict(walk_files(self.root, PathFilter(), ".md"))
+        self.assertNotIn("blog/notes.txt", entries)
+        self.assertEqual(entries["blog/a.md"].path, os.path.join(self.root, "blog", "a.md"))
+
+    def test_include_and_exclude(self):
+        self.assertListEqual(self.walk(PathFilter(exclude=["drafts", "_*"]), ".md"),
+                             ["index.md", "blog/a.md", "blog/b.md"])
+        self.assertListEqual(self.walk(PathFilter(include=["blog/*"], exclude=["blog/drafts/*"])),
+                             ["blog/a.md", "blog/b.md", "blog/notes.txt"])
+        path_filter = PathFilter(include=["blog/*"], exclude=["_*"])
+        self.assertTrue(path_filter.includes("blog/drafts/x.md"))
+        self.assertFalse(path_filter.includes("index.md"))
+        self.assertListEqual(self.walk(path_filter.without_include(), ".md"),
+                             ["index.md", "blog/a.md", "blog/b.md", "blog/drafts/wip.md"])
+
+    def test_deep_trees(self):
+        # Deeper than the recursion limit
+        path = self.root
+        for _ in range(1100):
+            path = os.path.join(path, "d")
+            os.mkdir(path)
+        open(os.path.join(path, "deep.md"), 'w').close()
+        self.assertEqual(len([p for p in self.walk(suffix=".md") if p.endswith("deep.md")]), 1)
+        # shutil.rmtree can't take it either
+        os.remove(os.path.join(path, "deep.md"))
+        while path != self.root:
+            os.rmdir(path)
+            path = os.path.dirname(path)
+
+    def test_lazy(self):
+        walker = walk_files(self.root)
+        self.assertEqual(next(walker)[0], "index.md")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os, re
+from copy import copy
+from fnmatch import translate
+
+class PathFilter():
+    # Glob rules for which files a walk yields. Patterns are matched against
+    # the path relative to the walk's root ("blog/drafts/post.md"); one
+    # without a '/' is also tried against the bare name, so "drafts" or
+    # "*.tmp" apply at any depth. An excluded directory isn't descended into.
+    # With no include patterns every file not excluded is yielded
+    def __init__(self, include=(), exclude=(), hidden=False):
+        self.include = compile_patterns(include)
+        self.exclude = compile_patterns(exclude)
+        self.hidden = hidden
+
+    def wants_dir(self, rel_path, name):
+        if not self.hidden and name.startswith('.'):
+            return False
+        return not matches(self.exclude, rel_path, name)
+
+    def wants_file(self, rel_path, name):
+        if not self.wants_dir(rel_path, name):
+            return False
+        return self.include is None or matches(self.include, rel_path, name)
+
+    def includes(self, rel_path):
+        # Whether rel_path is within the include patterns, whatever else
+        # would filter it
+        return self.include is None or matches(self.include, rel_path, rel_path.rpartition('/')[2])
+
+    def without_include(self):
+        # For trees the include patterns don't narrow, like static files
+        path_filter = copy(self)
+        path_filter.include = None
+        return path_filter
+
+def compile_patterns(patterns):
+    # All patterns folded into one regex each for full paths and bare names
+    if not patterns:
+        return None
+    paths = [translate(pattern) for pattern in patterns]
+    names = [translate(pattern) for pattern in patterns if '/' not in pattern]
+    return (re.compile('|'.join(paths)), re.compile('|'.join(names)) if names else None)
+
+def matches(compiled, rel_path, name):
+    if compiled is None:
+        return False
+    paths, names = compiled
+    return bool(paths.match(rel_path) or (names and names.match(name)))
+
+DEFAULT_FILTER = PathFilter()
+
+def walk_files(root, path_filter=DEFAULT_FILTER, suffix=''):
+    # Yields (rel_path, DirEntry) for every wanted file under root, in sorted
+    # order and as soon as each directory is read. Iterative, so depth is
+    # unbounded, and each entry's type comes from the scandir call itself
+    # rather than a stat per file. rel_path always uses '/'
+    stack = [(root, '')]
+    while stack:
+        path, prefix = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        subdirs = []
+        for entry in entries:
+            rel_path = prefix + entry.name
+            if entry.is_dir():
+                if path_filter.wants_dir(rel_path, entry.name):
+                    subdirs.append((entry.path, rel_path + '/'))
+            elif entry.name.endswith(suffix) and path_filter.wants_file(rel_path, entry.name):
+                yield rel_path, entry
+        stack.extend(reversed(subdirs))